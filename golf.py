@@ -1,19 +1,39 @@
 #!/usr/bin/env python3
 
-import sys
 import argparse
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 from pprint import pprint
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import time
 import inspect
 from prettytable import PrettyTable
 import sqlite3
-from flask import Flask, escape, request, render_template
+from flask import Flask, escape, request, render_template, abort, Response, make_response, stream_with_context, get_template_attribute
 from draft_kings import Sport, Client
-import random
 import operator
+import os
+import io
+import ast
+import gzip
+import zlib
+import hashlib
+import threading
+import queue
+import collections
+import concurrent.futures
+import unicodedata
+import heapq
+import signal
+import numpy as np
+import ijson
+from werkzeug.http import is_resource_modified
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 TOURNAMENT_ID   = 585
 MAJOR           = False
@@ -21,6 +41,10 @@ MAJOR           = False
 MAX_SALARY      = 50000
 NUM_PICKS       = 6
 
+FANTASY_POINTS_SCALE    = 100
+INFEASIBLE              = np.iinfo(np.int64).min
+LINEUP_SEARCH_MAX_NODES = 250000
+
 PICKS = {
     'Ben': [
         'Max Homa',
@@ -76,17 +100,71 @@ KEY = 'a478d29a98e54eac8e9ebf1f218dd0b8'
 
 START_DAY_WINDOW            = 4
 END_DAY_WINDOW              = 1
+DATABASE_FILENAME           = 'database.db'
+DB_POOL_SIZE                = 8
+DB_BUSY_TIMEOUT             = 30
+DB_CACHED_STATEMENTS        = 256
+DB_PRAGMAS                  = [
+    'PRAGMA journal_mode=WAL;',
+    'PRAGMA synchronous=NORMAL;',
+    'PRAGMA cache_size=-20000;',
+    'PRAGMA mmap_size=268435456;',
+    'PRAGMA temp_store=MEMORY;',
+]
 PLAYERS_FILENAME            = 'player_profiles.json'
 HEADSHOTS_FILENAME          = 'headshots.json'
+HEADSHOT_URLS_FILENAME      = 'headshot_urls.json'
+SCORING_RULES_FILENAME      = 'scoring_rules.json'
 LEADERBOARD_UPDATE_PERIOD   = 10 * 60
+LEADERBOARD_MIN_POLL_PERIOD = 2 * 60
+LEADERBOARD_CHECKPOINT_DIR  = '.cache'
+LEADERBOARD_HISTORY_COLUMNS = ['PlayerID', 'Rank', 'Points', 'OneAndDonePoints', 'Position', 'TotalThrough', 'TeeTime']
+RESULTS_STREAM_POLL_PERIOD  = 5
+RESULTS_STREAM_MAX_AGE      = 10 * 60
+RESULTS_STREAM_RETRY        = 5
+STATIC_MAX_AGE              = 365 * 24 * 60 * 60
+COMPRESS_MIN_SIZE           = 500
+COMPRESS_MIMETYPES          = ['text/html', 'text/css', 'text/javascript', 'application/javascript', 'application/json']
 ROUND_END_SLEEP_PERIOD      = 1 * 60 * 60
 MAJOR_MULTIPLIER            = 2
+TIE_SPLIT                   = False
+API_TIMEOUT                 = (5, 30)
+API_RETRIES                 = 5
+API_BACKOFF_FACTOR          = 0.5
+API_POOL_SIZE               = 16
+API_MAX_CONCURRENCY         = 4
+API_RATE_LIMIT              = 60
+API_RATE_PERIOD             = 60
+API_CACHE_DIR               = os.path.join('.cache', 'api')
+API_CACHE_MAX_BYTES         = 256 * 1024 * 1024
+API_IN_PROGRESS_TTL         = 5 * 60
+API_OFFLINE_DIR             = os.environ.get('GOLF_API_OFFLINE')
+
+# Seconds a cached response stays fresh. Endpoints left out are never cached.
+API_CACHE_TTLS = {
+    'Players'       : 24 * 60 * 60,
+    'Tournaments'   : 24 * 60 * 60,
+    'Headshots'     : 24 * 60 * 60,
+    'DfsSlates'     : 60 * 60,
+    'Projections'   : 60 * 60,
+}
+
+API_FIXTURE_NAMES = {
+    'Players'       : 'players',
+    'Tournaments'   : 'tournaments',
+    'Leaderboard'   : 'leaderboard',
+    'Projections'   : 'projections',
+    'DfsSlates'     : 'dfs_slates',
+    'Headshots'     : 'headshots',
+}
 
 CMDS = [
     'players',
     'manage-leaderboard',
     'update-leaderboard',
-    'create-leaderboard-table',
+    'clear-leaderboard',
+    'leaderboard-at',
+    'season-standings',
     'tournaments',
     'picks',
     'clear-picks',
@@ -140,81 +218,387 @@ OWNERS = [
     'Sean',
 ]
 
-BASE_URL = 'https://api.sportsdata.io'
+BASE_URL = os.environ.get('GOLF_API_BASE_URL', 'https://api.sportsdata.io')
 
 app = Flask(__name__)
 
-class Roster():
+class PlayerPool():
     def __init__(self, players):
-        self.players = sorted(players, key=lambda x: x['DraftKingsSalary'], reverse=True)
+        # Columns are kept in descending salary order, which is also the order
+        # the optimizer searches in.
+        players = sorted(players, key=lambda x: x['DraftKingsSalary'], reverse=True)
+
+        self.names          = [player['DraftKingsName'] for player in players]
+        self.salaries       = np.array([player['DraftKingsSalary'] for player in players], dtype=np.int64)
+        self.fantasy_points = np.array([player['FantasyPoints'] for player in players], dtype=np.float64)
+        self.values         = 1e6 * self.fantasy_points / self.salaries
+        # Points are compared as integers so that equal lineups tie exactly.
+        self.gains          = np.rint(self.fantasy_points * FANTASY_POINTS_SCALE).astype(np.int64)
+
+    def __len__(self):
+        return len(self.names)
+
+    def get_total_points(self, lineups):
+        # Accepts a single lineup or a matrix of lineups, one per row.
+        return self.fantasy_points[lineups].sum(axis=-1)
+
+    def get_total_salaries(self, lineups):
+        return self.salaries[lineups].sum(axis=-1)
+
+class Roster():
+    def __init__(self, pool, lineup):
+        self.pool = pool
+        self.lineup = np.sort(lineup)
         self.total_points = self.get_total_points()
         self.total_salary = self.get_total_salary()
 
     def get_total_points(self):
-        return sum([player['FantasyPoints'] for player in self.players])
+        return float(self.pool.get_total_points(self.lineup))
 
     def get_total_salary(self):
-        return sum([player['DraftKingsSalary'] for player in self.players])
+        return int(self.pool.get_total_salaries(self.lineup))
 
     def __str__(self):
         string = ''
         string += 'Points: {:.3f}, Salary: {:5}\n'.format(self.total_points, self.total_salary)
-        for player in self.players:
+        for i in self.lineup:
             string += '    {:30}, Points: {:.3f}, Salary: {:5}, Value: {:.3f}\n'.format(
-                player['DraftKingsName'],
-                player['FantasyPoints'],
-                player['DraftKingsSalary'],
-                player['Value'],
+                self.pool.names[i],
+                self.pool.fantasy_points[i],
+                self.pool.salaries[i],
+                self.pool.values[i],
             )
         return string
 
+class PlayerRecord():
+    __slots__ = [
+        'PlayerID',
+        'DraftKingsPlayerID',
+        'DraftKingsName',
+        'PhotoUrl',
+    ]
+
+    def __init__(self, player_profile):
+        for field in self.__slots__:
+            setattr(self, field, player_profile[field])
+
+    def __getitem__(self, field):
+        # Lets records stand in for the API dicts they replace.
+        return getattr(self, field)
+
+class PlayerIndex():
+    def __init__(self, player_profiles):
+        self.by_player_id = {}
+        self.by_draft_kings_player_id = {}
+        self.by_name = {}
+
+        # The first profile wins on duplicate keys, as the linear scans did.
+        for player_profile in player_profiles:
+            record = PlayerRecord(player_profile)
+            self.by_player_id.setdefault(record.PlayerID, record)
+            if record.DraftKingsPlayerID is not None:
+                self.by_draft_kings_player_id.setdefault(record.DraftKingsPlayerID, record)
+            if record.DraftKingsName is not None:
+                self.by_name.setdefault(normalize_player_name(record.DraftKingsName), record)
+
+    def __len__(self):
+        return len(self.by_player_id)
+
+class ScoringRules():
+    def __init__(self, points, one_and_done_points, major_multiplier=MAJOR_MULTIPLIER, majors=(), tie_split=TIE_SPLIT):
+        self.major_multiplier = major_multiplier
+        self.majors = set(majors)
+        self.tie_split = tie_split
+
+        # Dense rank -> points tables. Index 0 is for unranked players and the
+        # last index for every rank past the end of both tables.
+        size = max([end for start, end, points in points + one_and_done_points]) + 2
+        self.points = compile_points_table(points, size)
+        self.one_and_done_points = compile_points_table(one_and_done_points, size)
+
+    def is_major(self, tournament_id):
+        return tournament_id in self.majors or (MAJOR and tournament_id == TOURNAMENT_ID)
+
+    def score(self, ranks, major=False, tie_sizes=None):
+        # ranks holds 0 for unranked players. With tie_sizes, players tied for a
+        # rank share the points of every position the tie covers.
+        ranks = np.minimum(np.asarray(ranks, dtype=np.int64), len(self.points) - 1)
+        multiplier = self.major_multiplier if major else 1
+
+        if tie_sizes is None or not self.tie_split:
+            return self.points[ranks] * multiplier, self.one_and_done_points[ranks] * multiplier
+
+        tie_sizes = np.asarray(tie_sizes, dtype=np.int64)
+        ends = np.minimum(ranks + tie_sizes, len(self.points))
+
+        return split_points(self.points, ranks, ends) * multiplier, split_points(self.one_and_done_points, ranks, ends) * multiplier
+
+def split_points(table, starts, ends):
+    # Mean of table[start:end] for each pair, through a running sum.
+    totals = np.concatenate([[0], np.cumsum(table)])
+    return (totals[ends] - totals[starts]) / (ends - starts)
+
+def compile_points_table(points, size):
+    table = np.zeros(size, dtype=np.int64)
+    for start, end, rank_points in points:
+        table[start:end + 1] = rank_points
+
+    return table
+
 def parse_args():
     description = 'Fantasy Golf Tool'
 
     parser = argparse.ArgumentParser(description=description, formatter_class=argparse.RawTextHelpFormatter)
 
     parser.add_argument('cmd', help='Directory path', type=str, choices=CMDS)
-    parser.add_argument('-r', '--round-num', help='Round number', type=int, default=1)
+    parser.add_argument('-t', '--tournament-id', help='Tournament ID (default: {}, or every active tournament for manage-leaderboard)'.format(TOURNAMENT_ID), type=int)
+    parser.add_argument('--at', help='Time to replay the leaderboard at (default: now)', type=datetime.fromisoformat, default=None)
+    parser.add_argument('-r', '--round-num', help='Round number (default: resume from checkpoint, else 1)', type=int)
     parser.add_argument('-n', '--num-rosters', help='Number of rosters', type=int, default=1)
+    parser.add_argument('--max-overlap', help='Most players any two rosters may share. Below 3 the search can take many times longer and may stop short of --num-rosters', type=int, default=NUM_PICKS-1)
+    parser.add_argument('--min-unique', help='Fewest players that must differ between any two rosters', type=int, default=1)
 
     return parser.parse_args()
 
-def api_request(url):
+_api_session = None
+_api_session_lock = threading.Lock()
+_api_responses = {}
+
+def get_api_session():
+    # One keep-alive session per process, shared by every thread.
+    global _api_session
+    with _api_session_lock:
+        if _api_session is None:
+            retry = Retry(
+                total               = API_RETRIES,
+                backoff_factor      = API_BACKOFF_FACTOR,
+                status_forcelist    = [429, 500, 502, 503, 504],
+                allowed_methods     = ['GET'],
+            )
+            adapter = HTTPAdapter(pool_connections=API_POOL_SIZE, pool_maxsize=API_POOL_SIZE, max_retries=retry)
+
+            _api_session = requests.Session()
+            _api_session.mount('https://', adapter)
+            _api_session.mount('http://', adapter)
+
+    return _api_session
+
+def api_request(url, endpoint, resource_id=None, parser=json.load, ttl=None, revalidate=True):
+    # Responses parsed differently are cached separately.
+    cache_key = url if parser is json.load else '{}#{}'.format(url, parser.__name__)
+
+    if API_OFFLINE_DIR is not None:
+        data = load_api_fixture(endpoint, resource_id)
+        if parser is not json.load:
+            data = parser(io.BytesIO(json.dumps(data).encode()))
+        return data
+
+    if ttl is None:
+        ttl = API_CACHE_TTLS.get(endpoint, 0)
+    if ttl > 0:
+        data = load_api_cache(cache_key, ttl)
+        if data is not None:
+            print('API-CACHE: {}'.format(endpoint))
+            return data
+
+    data = api_fetch(url, cache_key, parser, revalidate)
+
+    if ttl > 0:
+        save_api_cache(cache_key, data)
+
+    return data
+
+def api_fetch(url, cache_key, parser, revalidate=True):
     payload = {
         'key': KEY,
     }
 
-    r = requests.get(url, params=payload)
-    return json.loads(r.text)
+    # Revalidate against the last response so an unchanged resource costs a 304.
+    headers = {}
+    cached = _api_responses.get(cache_key)
+    if cached is not None:
+        etag, last_modified, data = cached
+        if etag is not None:
+            headers['If-None-Match'] = etag
+        if last_modified is not None:
+            headers['If-Modified-Since'] = last_modified
+
+    # The body is streamed, so the connection is held until it has been parsed.
+    with _api_semaphore:
+        wait_for_api_quota()
+        r = get_api_session().get(url, params=payload, headers=headers, timeout=API_TIMEOUT, stream=True)
+
+        with r:
+            if r.status_code == 304 and cached is not None:
+                return cached[2]
+
+            r.raise_for_status()
+            r.raw.decode_content = True
+            data = parser(r.raw)
+
+            etag = r.headers.get('ETag')
+            last_modified = r.headers.get('Last-Modified')
+            # Responses fetched only once aren't worth keeping in memory.
+            if revalidate and (etag is not None or last_modified is not None):
+                _api_responses[cache_key] = (etag, last_modified, data)
+
+    return data
+
+def parse_leaderboard_players(input_file):
+    # Builds one whole player at a time as the bytes arrive and keeps only what
+    # the poll loop reads, so the per-hole detail that makes up most of the
+    # payload is dropped player by player instead of held for the whole field.
+    players = []
+    for player in ijson.items(input_file, 'Players.item', use_float=True):
+        players.append({
+            'PlayerID'      : player['PlayerID'],
+            'TotalScore'    : player['TotalScore'],
+            'TotalThrough'  : player['TotalThrough'],
+            'TeeTime'       : player['TeeTime'],
+            'Rounds'        : [{'Number': rnd['Number'], 'TeeTime': rnd['TeeTime']} for rnd in player['Rounds']],
+        })
+
+    return {'Players': players}
+
+_api_semaphore = threading.BoundedSemaphore(API_MAX_CONCURRENCY)
+_api_quota_lock = threading.Lock()
+_api_call_times = collections.deque()
+
+def wait_for_api_quota():
+    # Sliding window: at most API_RATE_LIMIT calls in any API_RATE_PERIOD.
+    while True:
+        with _api_quota_lock:
+            now = time.monotonic()
+            while _api_call_times and now - _api_call_times[0] >= API_RATE_PERIOD:
+                _api_call_times.popleft()
+
+            if len(_api_call_times) < API_RATE_LIMIT:
+                _api_call_times.append(now)
+                return
+
+            wait_seconds = API_RATE_PERIOD - (now - _api_call_times[0])
+
+        time.sleep(wait_seconds)
+
+def api_get_many(calls):
+    # Runs independent (function, args) calls side by side and returns their
+    # results in order. The semaphore and quota above still apply.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=API_MAX_CONCURRENCY) as executor:
+        futures = [executor.submit(function, *args) for function, args in calls]
+        return [future.result() for future in futures]
+
+def get_api_cache_path(url):
+    # The key is left out of the URL, so the cache survives a key change.
+    return os.path.join(API_CACHE_DIR, hashlib.sha256(url.encode()).hexdigest() + '.json.gz')
+
+def load_api_cache(url, ttl):
+    # mtime is when the response was fetched, atime when it was last used.
+    path = get_api_cache_path(url)
+    try:
+        stat = os.stat(path)
+        if time.time() - stat.st_mtime > ttl:
+            return None
+
+        with gzip.open(path, 'rt') as input_file:
+            data = json.load(input_file)
+
+        os.utime(path, (time.time(), stat.st_mtime))
+    except (OSError, ValueError):
+        return None
+
+    return data
+
+def save_api_cache(url, data):
+    os.makedirs(API_CACHE_DIR, exist_ok=True)
+
+    path = get_api_cache_path(url)
+    temp_path = '{}.{}.{}.tmp'.format(path, os.getpid(), threading.get_ident())
+    with gzip.open(temp_path, 'wt') as output_file:
+        json.dump(data, output_file)
+    os.replace(temp_path, path)
+
+    evict_api_cache()
+
+def evict_api_cache():
+    # Drop the least recently used responses until the cache fits.
+    entries = []
+    total_size = 0
+    for entry in os.scandir(API_CACHE_DIR):
+        if entry.name.endswith('.json.gz'):
+            stat = entry.stat()
+            entries.append((stat.st_atime, stat.st_size, entry.path))
+            total_size += stat.st_size
+
+    entries.sort()
+    for atime, size, path in entries:
+        if total_size <= API_CACHE_MAX_BYTES:
+            break
+
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_size -= size
+
+def load_api_fixture(endpoint, resource_id=None):
+    # Replays saved responses, e.g. examples/leaderboard.json. A fixture for a
+    # specific id (leaderboard_585.json) is preferred over the generic one.
+    name = API_FIXTURE_NAMES[endpoint]
+    filenames = ['{}.json'.format(name)]
+    if resource_id is not None:
+        filenames.insert(0, '{}_{}.json'.format(name, resource_id))
+
+    for filename in filenames:
+        path = os.path.join(API_OFFLINE_DIR, filename)
+        if os.path.exists(path):
+            print('API-REPLAY: {}'.format(path))
+            input_file = open(path, 'r')
+            text = input_file.read()
+            input_file.close()
+
+            try:
+                return json.loads(text)
+            except ValueError:
+                # Fixtures captured from the console are pprint output after
+                # the API-CALL line.
+                lines = [line for line in text.splitlines() if not line.startswith('API-CALL:')]
+                return ast.literal_eval('\n'.join(lines))
+
+    raise FileNotFoundError('No fixture for {} in {}'.format(endpoint, API_OFFLINE_DIR))
 
 def api_get_all_players():
     print('API-CALL: {}'.format(inspect.currentframe().f_code.co_name))
-    return api_request(BASE_URL + '/golf/v2/json/Players')
+    return api_request(BASE_URL + '/golf/v2/json/Players', 'Players')
+
+def api_get_all_tournaments(ttl=None):
+    print('API-CALL: {}'.format(inspect.currentframe().f_code.co_name))
+    return api_request(BASE_URL + '/golf/v2/json/Tournaments', 'Tournaments', ttl=ttl)
 
-def api_get_all_tournaments():
+def api_get_leaderboard(tournament_id, revalidate=True):
     print('API-CALL: {}'.format(inspect.currentframe().f_code.co_name))
-    return api_request(BASE_URL + '/golf/v2/json/Tournaments')
+    return api_request(BASE_URL + '/golf/v2/json/Leaderboard/{}'.format(tournament_id), 'Leaderboard', tournament_id, revalidate=revalidate)
 
-def api_get_leaderboard(tournament_id):
+def api_get_leaderboard_players(tournament_id):
     print('API-CALL: {}'.format(inspect.currentframe().f_code.co_name))
-    return api_request(BASE_URL + '/golf/v2/json/Leaderboard/{}'.format(tournament_id))
+    return api_request(BASE_URL + '/golf/v2/json/Leaderboard/{}'.format(tournament_id), 'Leaderboard', tournament_id, parse_leaderboard_players)
 
 def api_get_projections(tournament_id):
     print('API-CALL: {}'.format(inspect.currentframe().f_code.co_name))
-    return api_request(BASE_URL + '/golf/v2/json/PlayerTournamentProjectionStats/{}'.format(tournament_id))
+    return api_request(BASE_URL + '/golf/v2/json/PlayerTournamentProjectionStats/{}'.format(tournament_id), 'Projections', tournament_id)
 
 def api_get_dfs_slates(tournament_id):
     print('API-CALL: {}'.format(inspect.currentframe().f_code.co_name))
-    return api_request(BASE_URL + '/golf/v2/json/DfsSlatesByTournament/{}'.format(tournament_id))
+    return api_request(BASE_URL + '/golf/v2/json/DfsSlatesByTournament/{}'.format(tournament_id), 'DfsSlates', tournament_id)
 
 def api_get_headshots():
     print('API-CALL: {}'.format(inspect.currentframe().f_code.co_name))
-    return api_request(BASE_URL + '/v3/golf/headshots/json/Headshots')
+    return api_request(BASE_URL + '/v3/golf/headshots/json/Headshots', 'Headshots')
 
 def get_active_tournaments():
     active_tournaments = []
 
-    tournaments = api_get_all_tournaments()
+    # IsInProgress changes during the day, so a day old schedule won't do.
+    tournaments = api_get_all_tournaments(API_IN_PROGRESS_TTL)
     for tournament in tournaments:
         if tournament['IsInProgress']:
             active_tournaments.append(tournament)
@@ -235,105 +619,193 @@ def get_next_tournament():
 
     return tournaments
 
-def get_player_profile(player_id=None, draft_kings_player_id=None, player_profiles=None):
-    for player_profile in player_profiles:
-        if player_id is not None:
-            if player_id == player_profile['PlayerID']:
-                return player_profile
+def normalize_player_name(player_name):
+    # Match names regardless of case, accents and stray whitespace.
+    player_name = unicodedata.normalize('NFKD', player_name)
+    player_name = ''.join([c for c in player_name if not unicodedata.combining(c)])
+    return ' '.join(player_name.casefold().split())
 
-        if draft_kings_player_id is not None:
-            if draft_kings_player_id == player_profile['DraftKingsPlayerID']:
-                return player_profile
+def get_player_profile(player_id=None, draft_kings_player_id=None, player_index=None):
+    if player_index is None:
+        player_index = get_player_index()
 
-    return None
+    if player_id is not None and player_id in player_index.by_player_id:
+        return player_index.by_player_id[player_id]
 
-def get_player_id_from_name(player_name, player_profiles):
-    for player_profile in player_profiles:
-        if player_name == player_profile['DraftKingsName']:
-            return player_profile['PlayerID']
+    if draft_kings_player_id is not None and draft_kings_player_id in player_index.by_draft_kings_player_id:
+        return player_index.by_draft_kings_player_id[draft_kings_player_id]
 
     return None
 
-def get_points(rank, one_n_done=False, major=False):
-    multiplier = MAJOR_MULTIPLIER if major else 1
+def get_player_id_from_name(player_name, player_index=None):
+    if player_index is None:
+        player_index = get_player_index()
 
-    if rank is None:
-        return 0
-    else:
-        if one_n_done:
-            for start, end, points in ONE_N_DONE_POINTS:
-                if rank >= start and rank <= end:
-                    return points * multiplier
-        else:
-            for start, end, points in POINTS:
-                if rank >= start and rank <= end:
-                    return points * multiplier
-
-    return 0
-
-def parse_leaderboard(leaderboard, player_profiles):
-    # Unscramble the 'Rank' from fantasydata.com
-    ranked_leaderboard = []
-    unranked_leaderboard = []
-    rank = None
-    # Assigning rank starting at 1 (instead of 0)
-
-    ranked_player_count = 0
-    prev_total_score = None
-    current_rank = 1
-
-    for i, player in enumerate(leaderboard['Players']):
-        player_profile = get_player_profile(player_id=player['PlayerID'], player_profiles=player_profiles)
-
-        if player['TotalScore'] is not None:
-            ranked_player_count += 1
-
-            if player['TotalScore'] != prev_total_score:
-                current_rank = ranked_player_count
-
-            rank = current_rank
-            prev_total_score = player['TotalScore']
-
-            ranked_leaderboard.append({
-                'PlayerID'          : player['PlayerID'],
-                'Rank'              : str(rank),
-                'DraftKingsPlayerID': player_profile['DraftKingsPlayerID'],
-                'DraftKingsName'    : player_profile['DraftKingsName'],
-                'Points'            : str(get_points(rank, one_n_done=False, major=MAJOR)),
-                'OneAndDonePoints'  : str(get_points(rank, one_n_done=True , major=MAJOR)),
-                'TotalThrough'      : player['TotalThrough'] if player['TotalThrough'] is not None else "None",
-                'TeeTime'           : player['TeeTime'] if player['TeeTime'] is not None else "None",
-            })
-        else:
-            rank = None
-
-            unranked_leaderboard.append({
-                'PlayerID'          : player['PlayerID'],
-                'Rank'              : str(rank),
-                'DraftKingsPlayerID': player_profile['DraftKingsPlayerID'],
-                'DraftKingsName'    : player_profile['DraftKingsName'],
-                'Points'            : str(get_points(rank, one_n_done=False, major=MAJOR)),
-                'OneAndDonePoints'  : str(get_points(rank, one_n_done=True , major=MAJOR)),
-                'TotalThrough'      : player['TotalThrough'] if player['TotalThrough'] is not None else "None",
-                'TeeTime'           : player['TeeTime'] if player['TeeTime'] is not None else "None",
-            })
+    player_profile = player_index.by_name.get(normalize_player_name(player_name))
+    if player_profile is not None:
+        return player_profile.PlayerID
 
-    return ranked_leaderboard + unranked_leaderboard
+    return None
+
+def get_points(rank, one_n_done=False, major=False, rules=None):
+    if rules is None:
+        rules = get_scoring_rules()
+
+    points, one_and_done_points = rules.score([rank if rank is not None else 0], major)
+
+    return int(one_and_done_points[0] if one_n_done else points[0])
+
+def get_points_value(points):
+    # Split ties can leave fractions, kept to two places. Whole numbers stay
+    # integers.
+    points = round(float(points), 2)
+    return int(points) if points.is_integer() else points
+
+def parse_leaderboard(leaderboard, player_index, rules=None, major=MAJOR):
+    if rules is None:
+        rules = get_scoring_rules()
+
+    players = leaderboard['Players']
+
+    # Ranked players in TotalScore order, then everyone without a score in
+    # the order given.
+    scored = np.array([player['TotalScore'] is not None for player in players], dtype=bool)
+    scored_indexes = np.flatnonzero(scored)
+    scores = np.array([players[i]['TotalScore'] for i in scored_indexes], dtype=np.float64)
+    scored_indexes = scored_indexes[np.argsort(scores, kind='stable')]
+    scores = np.sort(scores, kind='stable')
+    order = np.concatenate([scored_indexes, np.flatnonzero(~scored)])
+
+    # Players level on TotalScore share the rank of the first of them.
+    # Assigning rank starting at 1 (instead of 0), and 0 while unranked
+    group_starts = np.ones(len(scores), dtype=bool)
+    group_starts[1:] = scores[1:] != scores[:-1]
+    groups = np.cumsum(group_starts) - 1
+    first_positions = np.flatnonzero(group_starts)
+
+    ranks = np.zeros(len(players), dtype=np.int64)
+    tie_sizes = np.ones(len(players), dtype=np.int64)
+    ranks[:len(scores)] = first_positions[groups] + 1
+    tie_sizes[:len(scores)] = np.bincount(groups, minlength=len(first_positions))[groups]
+
+    points, one_and_done_points = rules.score(ranks, major, tie_sizes)
+
+    parsed_leaderboard = []
+    for position, i in enumerate(order.tolist()):
+        player = players[i]
+        player_profile = get_player_profile(player_id=player['PlayerID'], player_index=player_index)
+
+        parsed_leaderboard.append({
+            'PlayerID'          : player['PlayerID'],
+            'Rank'              : int(ranks[position]) if ranks[position] else None,
+            'DraftKingsPlayerID': player_profile['DraftKingsPlayerID'],
+            'DraftKingsName'    : player_profile['DraftKingsName'],
+            'Points'            : get_points_value(points[position]),
+            'OneAndDonePoints'  : get_points_value(one_and_done_points[position]),
+            'TotalThrough'      : player['TotalThrough'],
+            'TeeTime'           : player['TeeTime'],
+        })
+
+    return parsed_leaderboard
+
+def load_json_file(filename):
+    # Parsed files are shared by every caller in the process and only re-read
+    # when the file on disk changes. Callers must not modify what they get back.
+    stat = os.stat(filename)
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    with _json_cache_lock:
+        stats = json_cache_stats.setdefault(filename, {'Hits': 0, 'Misses': 0})
+
+        cached = _json_cache.get(filename)
+        if cached is not None and cached[0] == signature:
+            stats['Hits'] += 1
+            return cached[1]
+
+        stats['Misses'] += 1
+        input_file = open(filename, 'r')
+        data = json.load(input_file)
+        input_file.close()
+
+        _json_cache[filename] = (signature, data)
+
+    return data
+
+_json_cache = {}
+_json_cache_lock = threading.Lock()
+json_cache_stats = {}
+
+def get_json_cache_stats():
+    with _json_cache_lock:
+        return {filename: dict(stats) for filename, stats in json_cache_stats.items()}
 
 def fetch_player_profiles():
     player_profiles = api_get_all_players()
 
-    output_file = open(PLAYERS_FILENAME, 'w')
-    json.dump(player_profiles, output_file)
-    output_file.close()
+    # Written aside and swapped in so readers never see a partial file.
+    temp_path = '{}.{}.{}.tmp'.format(PLAYERS_FILENAME, os.getpid(), threading.get_ident())
+    with open(temp_path, 'w') as output_file:
+        json.dump(player_profiles, output_file)
+    os.replace(temp_path, PLAYERS_FILENAME)
 
     return player_profiles
 
 def load_player_profiles():
-    input_file = open(PLAYERS_FILENAME, 'r')
-    player_profiles = json.load(input_file)
+    return load_json_file(PLAYERS_FILENAME)
+
+_default_scoring_rules = None
+_scoring_rules = {}
+_scoring_rules_config = None
+
+def get_scoring_rules(season=None):
+    # Seasons missing from SCORING_RULES_FILENAME, or every season when there is
+    # no such file, score with POINTS, ONE_N_DONE_POINTS and MAJOR_MULTIPLIER.
+    # The file maps a season to any of the same settings, plus the IDs of the
+    # season's majors:
+    #   {"2024": {"Points": [[1, 1, 150], ...], "OneAndDonePoints": [...], "MajorMultiplier": 2, "Majors": [...], "TieSplit": false}}
+    global _default_scoring_rules, _scoring_rules, _scoring_rules_config
+    if _default_scoring_rules is None:
+        _default_scoring_rules = ScoringRules(POINTS, ONE_N_DONE_POINTS)
+
+    try:
+        config = load_json_file(SCORING_RULES_FILENAME)
+    except FileNotFoundError:
+        return _default_scoring_rules
+
+    # Recompiled only when the file is re-read from disk.
+    if config is not _scoring_rules_config:
+        scoring_rules = {}
+        for config_season, rules in config.items():
+            scoring_rules[config_season] = ScoringRules(
+                [tuple(entry) for entry in rules.get('Points', POINTS)],
+                [tuple(entry) for entry in rules.get('OneAndDonePoints', ONE_N_DONE_POINTS)],
+                rules.get('MajorMultiplier', MAJOR_MULTIPLIER),
+                rules.get('Majors', []),
+                rules.get('TieSplit', TIE_SPLIT),
+            )
+        _scoring_rules = scoring_rules
+        _scoring_rules_config = config
 
-    return player_profiles
+    return _scoring_rules.get(str(season), _default_scoring_rules)
+
+def get_tournament_season(tournament):
+    if tournament is None:
+        return None
+
+    return tournament['StartDate'][:4]
+
+_player_index = None
+_player_index_profiles = None
+
+def get_player_index():
+    # Rebuilt only when the cached profiles are re-read from disk.
+    global _player_index, _player_index_profiles
+    player_profiles = load_player_profiles()
+    if player_profiles is not _player_index_profiles:
+        _player_index = PlayerIndex(player_profiles)
+        _player_index_profiles = player_profiles
+
+    return _player_index
 
 def fetch_headshots():
     headshots = api_get_headshots()
@@ -342,25 +814,43 @@ def fetch_headshots():
     json.dump(headshots, output_file)
     output_file.close()
 
+    save_headshot_urls(headshots)
+
     return headshots
 
 def load_headshots():
-    input_file = open(HEADSHOTS_FILENAME, 'r')
-    headshots = json.load(input_file)
+    return load_json_file(HEADSHOTS_FILENAME)
 
-    return headshots
+def save_headshot_urls(headshots):
+    # JSON object keys are strings, so the map is keyed by str(PlayerID).
+    headshot_urls = {}
+    for headshot in headshots:
+        if headshot['PreferredHostedHeadshotUrl'] is not None:
+            headshot_urls.setdefault(str(headshot['PlayerID']), headshot['PreferredHostedHeadshotUrl'])
 
-def get_db_connection():
-    conn = sqlite3.connect('database.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+    output_file = open(HEADSHOT_URLS_FILENAME, 'w')
+    json.dump(headshot_urls, output_file)
+    output_file.close()
 
-def create_tournaments_table():
-    conn = get_db_connection()
-    curr = conn.cursor()
-    curr.execute('DROP TABLE IF EXISTS tournaments;')
-    curr.execute('''
-        CREATE TABLE tournaments (
+    return headshot_urls
+
+def load_headshot_urls():
+    if not os.path.exists(HEADSHOT_URLS_FILENAME):
+        save_headshot_urls(load_headshots())
+
+    return load_json_file(HEADSHOT_URLS_FILENAME)
+
+def get_headshot_url(player_id, headshot_urls, player_profile=None):
+    headshot_url = headshot_urls.get(str(player_id))
+    if headshot_url is None and player_profile is not None:
+        headshot_url = player_profile['PhotoUrl']
+
+    return headshot_url
+
+DB_MIGRATIONS = [
+    # 1: Tables as the create-* commands used to build them.
+    [
+        '''CREATE TABLE IF NOT EXISTS tournaments (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             TournamentID INTEGER NOT NULL,
             Name TEXT NOT NULL,
@@ -369,19 +859,284 @@ def create_tournaments_table():
             Location TEXT,
             Venue TEXT,
             LeaderboardLastUpdated TEXT
-        );
-    ''')
+        );''',
+        '''CREATE TABLE IF NOT EXISTS salaries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            TournamentID INTEGER,
+            PlayerID INTEGER,
+            DraftKingsPlayerID INTEGER,
+            DraftKingsName TEXT,
+            DraftKingsSalary INTEGER,
+            FantasyPoints REAL
+        );''',
+        '''CREATE TABLE IF NOT EXISTS leaderboards (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            TournamentID INTEGER NOT NULL,
+            PlayerID TEXT NOT NULL,
+            Rank TEXT NOT NULL,
+            DraftKingsPlayerID TEXT NOT NULL,
+            DraftKingsName TEXT NOT NULL,
+            Points TEXT NOT NULL,
+            OneAndDonePoints TEXT NOT NULL,
+            Position INTEGER NOT NULL,
+            TotalThrough TEXT,
+            TeeTime TEXT
+        );''',
+        # TODO: convert all appropriate table TEXTs to INTEGERs
+        '''CREATE TABLE IF NOT EXISTS picks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            Owner TEXT NOT NULL,
+            TournamentID INTEGER NOT NULL,
+            PlayerID INTEGER NOT NULL,
+            OneAndDone INTEGER NOT NULL
+        );''',
+    ],
+    # 2: Indexes for the per-tournament lookups. Duplicate rows left behind by
+    # older versions are dropped, keeping the newest, so the unique indexes fit.
+    [
+        'DELETE FROM leaderboards WHERE id NOT IN (SELECT MAX(id) FROM leaderboards GROUP BY TournamentID, PlayerID);',
+        'CREATE UNIQUE INDEX IF NOT EXISTS leaderboards_tournament_player ON leaderboards (TournamentID, PlayerID);',
+        'CREATE INDEX IF NOT EXISTS leaderboards_tournament_position ON leaderboards (TournamentID, Position);',
+        'DELETE FROM tournaments WHERE id NOT IN (SELECT MAX(id) FROM tournaments GROUP BY TournamentID);',
+        'CREATE UNIQUE INDEX IF NOT EXISTS tournaments_tournament ON tournaments (TournamentID);',
+        'CREATE INDEX IF NOT EXISTS tournaments_dates ON tournaments (StartDate, EndDate);',
+        'CREATE INDEX IF NOT EXISTS salaries_tournament_player ON salaries (TournamentID, PlayerID);',
+        'CREATE INDEX IF NOT EXISTS picks_tournament_owner ON picks (TournamentID, Owner);',
+    ],
+    # 3: What /results shows, rebuilt whenever the leaderboard or picks change.
+    [
+        '''CREATE TABLE IF NOT EXISTS results_snapshots (
+            TournamentID INTEGER PRIMARY KEY,
+            Version INTEGER NOT NULL,
+            StaleAt TEXT NOT NULL,
+            Snapshot TEXT NOT NULL
+        );''',
+    ],
+    # 4: Leaderboard columns typed, with NULL rather than 'None' for missing
+    # values. Snapshots built from the old rows are rebuilt on next read.
+    [
+        '''CREATE TABLE leaderboards_typed (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            TournamentID INTEGER NOT NULL,
+            PlayerID INTEGER NOT NULL,
+            Rank INTEGER,
+            DraftKingsPlayerID INTEGER,
+            DraftKingsName TEXT NOT NULL,
+            Points INTEGER NOT NULL,
+            OneAndDonePoints INTEGER NOT NULL,
+            Position INTEGER NOT NULL,
+            TotalThrough INTEGER,
+            TeeTime TEXT
+        );''',
+        '''INSERT INTO leaderboards_typed SELECT
+            id,
+            TournamentID,
+            CAST(PlayerID AS INTEGER),
+            CASE WHEN Rank IN ('None', '') THEN NULL ELSE CAST(Rank AS INTEGER) END,
+            CASE WHEN DraftKingsPlayerID IN ('None', 'Unknown', '') THEN NULL ELSE CAST(DraftKingsPlayerID AS INTEGER) END,
+            DraftKingsName,
+            Points + 0,
+            OneAndDonePoints + 0,
+            Position,
+            CASE WHEN TotalThrough IN ('None', '') THEN NULL ELSE CAST(TotalThrough AS INTEGER) END,
+            CASE WHEN TeeTime IN ('None', '') THEN NULL ELSE TeeTime END
+        FROM leaderboards;''',
+        'DROP TABLE leaderboards;',
+        'ALTER TABLE leaderboards_typed RENAME TO leaderboards;',
+        'CREATE UNIQUE INDEX leaderboards_tournament_player ON leaderboards (TournamentID, PlayerID);',
+        'CREATE INDEX leaderboards_tournament_position ON leaderboards (TournamentID, Position);',
+        "UPDATE results_snapshots SET StaleAt = '0001-01-01T00:00:00';",
+    ],
+    # 5: Every poll's changed rows, for replaying a tournament.
+    [
+        '''CREATE TABLE IF NOT EXISTS leaderboard_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            TournamentID INTEGER NOT NULL,
+            PolledAt TEXT NOT NULL,
+            Delta BLOB NOT NULL
+        );''',
+        'CREATE INDEX IF NOT EXISTS leaderboard_history_tournament ON leaderboard_history (TournamentID, PolledAt);',
+    ],
+    # 6: Season standings, kept up to date as tournament totals change, and the
+    # One-N-Dones each owner has used. Standings are filled in by the
+    # season-standings command.
+    [
+        '''CREATE TABLE IF NOT EXISTS season_results (
+            Season TEXT NOT NULL,
+            TournamentID INTEGER NOT NULL,
+            Owner TEXT NOT NULL,
+            Points INTEGER NOT NULL,
+            PRIMARY KEY (TournamentID, Owner)
+        );''',
+        '''CREATE TABLE IF NOT EXISTS season_standings (
+            Season TEXT NOT NULL,
+            Owner TEXT NOT NULL,
+            Points INTEGER NOT NULL,
+            Tournaments INTEGER NOT NULL,
+            PRIMARY KEY (Season, Owner)
+        );''',
+        '''CREATE TABLE IF NOT EXISTS one_and_done_usage (
+            Season TEXT NOT NULL,
+            Owner TEXT NOT NULL,
+            PlayerID INTEGER NOT NULL,
+            TournamentID INTEGER NOT NULL,
+            PRIMARY KEY (Season, Owner, PlayerID)
+        );''',
+        '''INSERT OR IGNORE INTO one_and_done_usage (Season, Owner, PlayerID, TournamentID)
+            SELECT substr(tournaments.StartDate, 1, 4), picks.Owner, picks.PlayerID, picks.TournamentID
+            FROM picks JOIN tournaments ON tournaments.TournamentID == picks.TournamentID
+            WHERE picks.OneAndDone
+            ORDER BY picks.id;''',
+    ],
+    # 7: Salaries from every slate and operator. Existing rows came from a
+    # single DraftKings slate.
+    [
+        'ALTER TABLE salaries ADD COLUMN Operator TEXT;',
+        'ALTER TABLE salaries ADD COLUMN SlateID INTEGER;',
+        'ALTER TABLE salaries ADD COLUMN OperatorPlayerID TEXT;',
+        'ALTER TABLE salaries ADD COLUMN OperatorPlayerName TEXT;',
+        'ALTER TABLE salaries ADD COLUMN OperatorSalary INTEGER;',
+        "UPDATE salaries SET Operator = 'DraftKings', OperatorPlayerID = DraftKingsPlayerID, OperatorPlayerName = DraftKingsName, OperatorSalary = DraftKingsSalary;",
+        'CREATE INDEX IF NOT EXISTS salaries_tournament_operator ON salaries (TournamentID, Operator, SlateID);',
+    ],
+    # 8: Points are REAL, since split ties leave fractions. Totals already
+    # stored are rounded to two places and snapshots rebuilt on next read.
+    [
+        '''CREATE TABLE leaderboards_real (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            TournamentID INTEGER NOT NULL,
+            PlayerID INTEGER NOT NULL,
+            Rank INTEGER,
+            DraftKingsPlayerID INTEGER,
+            DraftKingsName TEXT NOT NULL,
+            Points REAL NOT NULL,
+            OneAndDonePoints REAL NOT NULL,
+            Position INTEGER NOT NULL,
+            TotalThrough INTEGER,
+            TeeTime TEXT
+        );''',
+        'INSERT INTO leaderboards_real SELECT * FROM leaderboards;',
+        'DROP TABLE leaderboards;',
+        'ALTER TABLE leaderboards_real RENAME TO leaderboards;',
+        'CREATE UNIQUE INDEX leaderboards_tournament_player ON leaderboards (TournamentID, PlayerID);',
+        'CREATE INDEX leaderboards_tournament_position ON leaderboards (TournamentID, Position);',
+        '''CREATE TABLE season_results_real (
+            Season TEXT NOT NULL,
+            TournamentID INTEGER NOT NULL,
+            Owner TEXT NOT NULL,
+            Points REAL NOT NULL,
+            PRIMARY KEY (TournamentID, Owner)
+        );''',
+        'INSERT INTO season_results_real SELECT Season, TournamentID, Owner, ROUND(Points, 2) FROM season_results;',
+        'DROP TABLE season_results;',
+        'ALTER TABLE season_results_real RENAME TO season_results;',
+        '''CREATE TABLE season_standings_real (
+            Season TEXT NOT NULL,
+            Owner TEXT NOT NULL,
+            Points REAL NOT NULL,
+            Tournaments INTEGER NOT NULL,
+            PRIMARY KEY (Season, Owner)
+        );''',
+        'INSERT INTO season_standings_real SELECT Season, Owner, ROUND(Points, 2), Tournaments FROM season_standings;',
+        'DROP TABLE season_standings;',
+        'ALTER TABLE season_standings_real RENAME TO season_standings;',
+        "UPDATE results_snapshots SET StaleAt = '0001-01-01T00:00:00';",
+    ],
+]
+
+def migrate_db(conn):
+    # PRAGMA user_version holds the number of migrations already applied.
+    while True:
+        conn.execute('BEGIN IMMEDIATE')
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version >= len(DB_MIGRATIONS):
+            conn.rollback()
+            break
+
+        print('Migrating database to version {}'.format(version + 1))
+        for statement in DB_MIGRATIONS[version]:
+            conn.execute(statement)
+        conn.execute('PRAGMA user_version = {}'.format(version + 1))
+        conn.commit()
+
+_db_migrated = False
+_db_migrate_lock = threading.Lock()
+_db_local = threading.local()
+_db_pool = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+# Leaderboard managers for concurrent tournaments take turns writing rather
+# than contending for SQLite's write lock.
+_db_write_lock = threading.Lock()
+
+def open_db_connection():
+    global _db_migrated
+    # Connections move between threads through the pool, but each is only ever
+    # used by the thread it is bound to.
+    conn = sqlite3.connect(DATABASE_FILENAME, timeout=DB_BUSY_TIMEOUT, cached_statements=DB_CACHED_STATEMENTS, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    for pragma in DB_PRAGMAS:
+        conn.execute(pragma)
+
+    with _db_migrate_lock:
+        if not _db_migrated:
+            migrate_db(conn)
+            _db_migrated = True
+
+    return conn
+
+def get_db_connection():
+    # Every helper in a thread shares one connection, so callers commit but
+    # never close it.
+    conn = getattr(_db_local, 'conn', None)
+    if conn is None:
+        try:
+            conn = _db_pool.get_nowait()
+        except queue.Empty:
+            conn = open_db_connection()
+        _db_local.conn = conn
+
+    return conn
+
+def release_db_connection():
+    # Hands the thread's connection back to the pool for the next thread.
+    conn = getattr(_db_local, 'conn', None)
+    if conn is None:
+        return
+    _db_local.conn = None
+
+    if conn.in_transaction:
+        conn.rollback()
+
+    try:
+        _db_pool.put_nowait(conn)
+    except queue.Full:
+        conn.close()
+
+def clear_leaderboard(tournament_id):
+    conn = get_db_connection()
+    conn.execute('DELETE FROM leaderboards WHERE TournamentID == ?', (tournament_id,))
     conn.commit()
-    conn.close()
 
-def populate_tournaments_table():
-    tournaments = api_get_all_tournaments()
+    # Replays start over from here.
+    append_leaderboard_history(conn, tournament_id, datetime.now(), zlib.compress(json.dumps({'Reset': True}).encode()))
+    conn.commit()
 
+    _leaderboard_snapshots.pop(tournament_id, None)
+    refresh_results_snapshot(tournament_id)
+
+def clear_picks(tournament_id):
     conn = get_db_connection()
-    curr = conn.cursor()
+    conn.execute('DELETE FROM picks WHERE TournamentID == ?', (tournament_id,))
+    conn.execute('DELETE FROM one_and_done_usage WHERE TournamentID == ?', (tournament_id,))
+    conn.commit()
+
+    refresh_results_snapshot(tournament_id)
 
+def populate_tournaments_table():
+    tournaments = api_get_all_tournaments()
+
+    rows = []
     for tournament in tournaments:
-        curr.execute('INSERT INTO tournaments (TournamentID, Name, StartDate, EndDate, Location, Venue) VALUES (?, ?, ?, ?, ?, ?)', (
+        rows.append((
             tournament['TournamentID'],
             tournament['Name'],
             tournament['StartDate'],
@@ -390,64 +1145,109 @@ def populate_tournaments_table():
             tournament['Venue'],
         ))
 
-    conn.commit()
-    conn.close()
-
-def create_salaries_table():
     conn = get_db_connection()
     curr = conn.cursor()
-    curr.execute('DROP TABLE IF EXISTS salaries;')
-    curr.execute('''
-        CREATE TABLE salaries (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            TournamentID INTEGER,
-            PlayerID INTEGER,
-            DraftKingsPlayerID INTEGER,
-            DraftKingsName TEXT,
-            DraftKingsSalary INTEGER,
-            FantasyPoints REAL
-        );
-    ''')
+
+    # Upsert so LeaderboardLastUpdated survives a refresh of the schedule.
+    curr.executemany('''INSERT INTO tournaments (TournamentID, Name, StartDate, EndDate, Location, Venue) VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (TournamentID) DO UPDATE SET
+            Name=excluded.Name,
+            StartDate=excluded.StartDate,
+            EndDate=excluded.EndDate,
+            Location=excluded.Location,
+            Venue=excluded.Venue''', rows)
+
     conn.commit()
-    conn.close()
 
 def populate_salaries_table(tournament_id):
+    # Replaces the tournament's salaries with every slate from every operator.
+    # Slate players are joined to projections and profiles through dicts keyed
+    # by PlayerID, and each slate is written with one executemany. Returns what
+    # was loaded and which players could not be matched.
     tournament = get_tournament_from_id(tournament_id)
     if tournament is None:
-        return
+        return None
 
-    player_profiles = load_player_profiles()
+    player_index = get_player_index()
+
+    projections, dfs_slates = api_get_many([
+        (api_get_projections, (tournament_id,)),
+        (api_get_dfs_slates , (tournament_id,)),
+    ])
 
     fantasy_points = {}
-    projections = api_get_projections(TOURNAMENT_ID)
     for projection in projections:
         fantasy_points[projection['PlayerID']] = projection['FantasyPoints']
 
-    dfs_slates = api_get_dfs_slates(TOURNAMENT_ID)
-    for dfs_slate in dfs_slates:
-        if (dfs_slate['Operator'] == 'DraftKings'):
-            conn = get_db_connection()
-            curr = conn.cursor()
+    report = {
+        'TournamentID'      : tournament_id,
+        'Slates'            : [],
+        'UnmatchedProfiles' : [],
+        'MissingProjections': [],
+    }
+
+    conn = get_db_connection()
+    with _db_write_lock:
+        conn.execute('DELETE FROM salaries WHERE TournamentID == ?', (tournament_id,))
+
+        for dfs_slate in dfs_slates:
+            if dfs_slate.get('RemovedByOperator'):
+                continue
+
+            draft_kings = dfs_slate['Operator'] == 'DraftKings'
 
+            rows = []
             for player in dfs_slate['DfsSlatePlayers']:
-                player_profile = get_player_profile(player_id=player['PlayerID'], player_profiles=player_profiles)
-
-                if player_profile is not None:
-                    curr.execute('INSERT INTO salaries (TournamentID, PlayerID, DraftKingsPlayerID, DraftKingsName, DraftKingsSalary, FantasyPoints) VALUES (?, ?, ?, ?, ?, ?)', (
-                        tournament_id,
-                        player_profile['PlayerID'],
-                        player_profile['DraftKingsPlayerID'],
-                        player_profile['DraftKingsName'],
-                        player['OperatorSalary'],
-                        fantasy_points.get(player_profile['PlayerID'], 0),
-                    ))
-                else:
-                    print('WTF {}'.format(player['OperatorPlayerName']))
+                if player.get('RemovedByOperator'):
+                    continue
+
+                unmatched = {
+                    'SlateID'           : dfs_slate['SlateID'],
+                    'Operator'          : dfs_slate['Operator'],
+                    'PlayerID'          : player['PlayerID'],
+                    'OperatorPlayerID'  : player['OperatorPlayerID'],
+                    'OperatorPlayerName': player['OperatorPlayerName'],
+                }
+
+                player_profile = player_index.by_player_id.get(player['PlayerID'])
+                if player_profile is None:
+                    report['UnmatchedProfiles'].append(unmatched)
+                if player['PlayerID'] not in fantasy_points:
+                    report['MissingProjections'].append(unmatched)
+
+                rows.append((
+                    tournament_id,
+                    player['PlayerID'],
+                    player_profile.DraftKingsPlayerID if player_profile is not None else None,
+                    player_profile.DraftKingsName if player_profile is not None else None,
+                    player['OperatorSalary'] if draft_kings else None,
+                    fantasy_points.get(player['PlayerID'], 0),
+                    dfs_slate['Operator'],
+                    dfs_slate['SlateID'],
+                    player['OperatorPlayerID'],
+                    player['OperatorPlayerName'],
+                    player['OperatorSalary'],
+                ))
+
+            conn.executemany('''INSERT INTO salaries (TournamentID, PlayerID, DraftKingsPlayerID, DraftKingsName, DraftKingsSalary, FantasyPoints, Operator, SlateID, OperatorPlayerID, OperatorPlayerName, OperatorSalary)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', rows)
+
+            report['Slates'].append({
+                'SlateID'   : dfs_slate['SlateID'],
+                'Operator'  : dfs_slate['Operator'],
+                'Players'   : len(rows),
+            })
 
-            conn.commit()
-            conn.close()
+        conn.commit()
 
-            break
+    print('Loaded {} slates for tournament {}: {} players without a profile, {} without a projection'.format(
+        len(report['Slates']),
+        tournament_id,
+        len(report['UnmatchedProfiles']),
+        len(report['MissingProjections']),
+    ))
+
+    return report
 
 # def populate_salaries_table(tournament_id):
 #     tournament = get_tournament_from_id(tournament_id)
@@ -586,46 +1386,107 @@ def get_tournaments():
         FROM tournaments WHERE EndDate >= datetime('now', '-2 days') AND StartDate <= datetime('now', '+21 days')
         ORDER BY EndDate''').fetchall()
 
-    conn.close()
 
     return active_tournaments, upcoming_tournaments, past_tournaments, relevant_tournaments
 
 def get_tournament_from_id(tournament_id):
     conn = get_db_connection()
-    tournaments = conn.execute('SELECT * FROM tournaments WHERE TournamentID == {}'.format(tournament_id)).fetchall()
-    conn.close()
+    tournament = conn.execute('SELECT * FROM tournaments WHERE TournamentID == ?', (tournament_id,)).fetchone()
 
-    if len(tournaments) >= 0:
-        return tournaments[0]
-    else:
-        return None
+    return tournament
+
+def get_salaries(tournament_id, operator='DraftKings'):
+    # The operator's main slate, taken to be its largest.
+    query = '''SELECT * FROM salaries WHERE TournamentID == ? AND Operator == ? AND SlateID IS (
+        SELECT SlateID FROM salaries WHERE TournamentID == ? AND Operator == ? GROUP BY SlateID ORDER BY COUNT(*) DESC, MIN(id) LIMIT 1
+    ) ORDER BY PlayerID, id'''
 
-def get_salaries(tournament_id):
     conn = get_db_connection()
-    salaries = conn.execute('SELECT * FROM salaries WHERE TournamentID == {}'.format(tournament_id)).fetchall()
-    conn.close()
+    salaries = conn.execute(query, (tournament_id, operator, tournament_id, operator)).fetchall()
 
     if len(salaries) == 0:
         populate_salaries_table(tournament_id)
 
         conn = get_db_connection()
-        salaries = conn.execute('SELECT * FROM salaries WHERE TournamentID == {}'.format(tournament_id)).fetchall()
-        conn.close()
+        salaries = conn.execute(query, (tournament_id, operator, tournament_id, operator)).fetchall()
 
     return salaries
 
+@app.teardown_request
+def teardown_request(exception):
+    release_db_connection()
+
+def get_static_version(filename):
+    try:
+        return int(os.stat(os.path.join(app.static_folder, filename)).st_mtime)
+    except OSError:
+        return None
+
+def get_static_url(filename):
+    # Same URL url_for('static') builds, for snapshots built outside a request.
+    static_url = '{}/{}'.format(app.static_url_path, filename)
+    version = get_static_version(filename)
+    if version is not None:
+        static_url += '?v={}'.format(version)
+
+    return static_url
+
+@app.url_defaults
+def add_static_version(endpoint, values):
+    # Static URLs change whenever the file does, so browsers can keep them.
+    if endpoint == 'static' and 'filename' in values:
+        version = get_static_version(values['filename'])
+        if version is not None:
+            values['v'] = version
+
+@app.after_request
+def finalize_response(response):
+    if request.endpoint == 'static' and 'v' in request.args:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = STATIC_MAX_AGE
+        response.cache_control.immutable = True
+
+    # Pages are revalidated on every view. Routes that can tell whether the
+    # page changed without rendering it set their own ETag.
+    if request.method == 'GET' and response.status_code in (200, 304) and response.mimetype == 'text/html' and not response.is_streamed:
+        if 'ETag' not in response.headers:
+            response.add_etag(weak=True)
+        response.cache_control.no_cache = True
+        response.make_conditional(request)
+
+    compress_response(response)
+
+    return response
+
+def compress_response(response):
+    if response.status_code != 200 or response.is_streamed or response.direct_passthrough:
+        return
+    if response.mimetype not in COMPRESS_MIMETYPES or 'Content-Encoding' in response.headers:
+        return
+
+    response.vary.add('Accept-Encoding')
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return
+
+    if brotli is not None and 'br' in request.accept_encodings:
+        response.set_data(brotli.compress(data))
+        response.headers['Content-Encoding'] = 'br'
+    elif 'gzip' in request.accept_encodings:
+        response.set_data(gzip.compress(data, compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
-def get_player_standing(player_id, leaderboard):
-    for player in leaderboard:
-        if int(player_id) == int(player['PlayerID']):
-            return player
-
-    return None
-
 def get_last_updated_str(last_updated):
+    # Tournaments whose leaderboard has never been polled have no age.
+    if last_updated['LeaderboardLastUpdated'] is None:
+        return 'Not updated yet', None
+
     delta_time = datetime.now() - datetime.fromisoformat(last_updated['LeaderboardLastUpdated'])
 
     hours, remainder = divmod(delta_time.total_seconds(), 3600)
@@ -640,34 +1501,46 @@ def get_last_updated_str(last_updated):
 
     return last_updated_str, delta_time.total_seconds()
 
-def get_seconds_since_tee_time(tee_time):
-    delta_time = datetime.now() - tee_time
-    return delta_time.total_seconds()
-
-@app.route('/results')
-def results():
-    # tournament_id = request.args.get('tournamentid')
-    tournament_id = TOURNAMENT_ID  # TODO: switch back to dropdown
-
+def build_results_snapshot(tournament_id):
     tournament = get_tournament_from_id(tournament_id)
     if tournament is None:
-        return
+        return None
 
     leaderboard, last_updated = get_leaderboard(tournament_id)
-    last_updated_str, total_seconds = get_last_updated_str(last_updated)
 
     # Convert and simplify tee times, and calculate F for TotalThrough (since it's not provided by the API.
-    leaderboard = [dict(row) for row in leaderboard]
+    # A player shows F an hour after teeing off, so the snapshot goes stale at
+    # the next of those.
+    now = datetime.now()
+    stale_at = datetime.max
+    standings = {}
+    rows = []
     for player in leaderboard:
-        if player['TeeTime'] is not None and player['TeeTime'] != 'None':
-            player['SecondsSinceTeeTime'] = get_seconds_since_tee_time(convert_tee_time(player['TeeTime']))
-            player['TeeTime'] = get_time_str(convert_tee_time(player['TeeTime']))
-            if (player['TotalThrough'] is None or player['TotalThrough'] == 'None') and player['SecondsSinceTeeTime'] > 3600:
-                player['TotalThrough'] = 'F'
+        row = {
+            'PlayerID'          : player['PlayerID'],
+            'Rank'              : player['Rank'],
+            'DraftKingsName'    : player['DraftKingsName'],
+            'Points'            : get_points_value(player['Points']),
+            'OneAndDonePoints'  : get_points_value(player['OneAndDonePoints']),
+            'TotalThrough'      : player['TotalThrough'],
+            'TeeTime'           : player['TeeTime'],
+        }
+
+        if row['TeeTime'] is not None:
+            tee_time = convert_tee_time(row['TeeTime'])
+            row['TeeTime'] = get_time_str(tee_time)
+            if row['TotalThrough'] is None:
+                finished_at = tee_time + timedelta(hours=1)
+                if finished_at < now:
+                    row['TotalThrough'] = 'F'
+                else:
+                    stale_at = min(stale_at, finished_at)
 
-    player_profiles = load_player_profiles()
-    headshots = load_headshots()
-    pprint(headshots)
+        standings[row['PlayerID']] = row
+        rows.append(row)
+
+    player_index = get_player_index()
+    headshot_urls = load_headshot_urls()
     picks = get_picks(tournament_id)
 
     edited_picks = {}
@@ -676,11 +1549,7 @@ def results():
         edited_picks[owner] = []
         totals[owner] = 0
         for pick in picks[owner]:
-            player_profile = get_player_profile(player_id=pick['PlayerID'], player_profiles=player_profiles)
-
-            for player in leaderboard:
-                if int(player['PlayerID']) == int(pick['PlayerID']):
-                    break
+            player_profile = get_player_profile(player_id=pick['PlayerID'], player_index=player_index)
 
             if player_profile['DraftKingsName'] == 'Natalie Shelton':
                 totals[owner] += 0
@@ -690,14 +1559,13 @@ def results():
                     'Rank'                  : None,
                     'Points'                : 0,
                     'OneAndDonePoints'      : 0,
-                    'PhotoUrl'              : '/static/natalie.jpg',
+                    'PhotoUrl'              : get_static_url('natalie.jpg'),
                     'OneAndDone'            : pick['OneAndDone'],
-                    'TotalThrough'          : 'None',
-                    'TeeTime'               : 'None',
-                    'SecondsSinceTeeTime'   : 'None',
+                    'TotalThrough'          : None,
+                    'TeeTime'               : None,
                 })
             else:
-                standing = get_player_standing(pick['PlayerID'], leaderboard)
+                standing = standings.get(pick['PlayerID'])
                 if standing is None:
                     print('Failed to find {} ({}) in leaderboard'.format(player_profile['DraftKingsName'], pick['PlayerID']))
                 else:
@@ -706,15 +1574,11 @@ def results():
                     # else:
                     #     totals[owner] += float(standing['Points']) if MAJOR else int(standing['Points'])
                     if pick['OneAndDone']:
-                        totals[owner] += int(standing['OneAndDonePoints'])
+                        totals[owner] += standing['OneAndDonePoints']
                     else:
-                        totals[owner] += int(standing['Points'])
+                        totals[owner] += standing['Points']
 
-                    headshot_url = player_profile['PhotoUrl']
-                    for headshot in headshots:
-                        if headshot['PlayerID'] == pick['PlayerID']:
-                            headshot_url = headshot['PreferredHostedHeadshotUrl']
-                            break
+                    headshot_url = get_headshot_url(pick['PlayerID'], headshot_urls, player_profile)
 
                     edited_picks[owner].append({
                         'DraftKingsName'        : player_profile['DraftKingsName'],
@@ -723,17 +1587,292 @@ def results():
                         'OneAndDonePoints'      : standing['OneAndDonePoints'],
                         'PhotoUrl'              : headshot_url,
                         'OneAndDone'            : pick['OneAndDone'],
-                        'TotalThrough'          : player['TotalThrough'],
-                        'TeeTime'               : player['TeeTime'],
-                        'SecondsSinceTeeTime'   : player['SecondsSinceTeeTime'],
+                        'TotalThrough'          : standing['TotalThrough'],
+                        'TeeTime'               : standing['TeeTime'],
                     })
 
+        totals[owner] = get_points_value(totals[owner])
+
         # edited_picks[owner] = dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
         # edited_picks[owner] = sorted(edited_picks[owner], key=operator.itemgetter('Rank'))
 
     totals = dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
 
-    return render_template('results.html', leaderboard=leaderboard, picks=edited_picks, totals=totals, owners=OWNERS, last_updated=last_updated_str, total_seconds=total_seconds, tournament=tournament)
+    snapshot = {
+        'Tournament'                : dict(tournament),
+        'Leaderboard'               : rows,
+        'Picks'                     : edited_picks,
+        'Totals'                    : totals,
+        'LeaderboardLastUpdated'    : last_updated['LeaderboardLastUpdated'],
+    }
+
+    return snapshot, stale_at
+
+def save_results_snapshot(tournament_id):
+    # Callers hold _db_write_lock.
+    built = build_results_snapshot(tournament_id)
+    if built is None:
+        return None
+    snapshot, stale_at = built
+
+    conn = get_db_connection()
+    conn.execute('''INSERT INTO results_snapshots (TournamentID, Version, StaleAt, Snapshot) VALUES (?, 1, ?, ?)
+        ON CONFLICT (TournamentID) DO UPDATE SET
+            Version=Version + 1,
+            StaleAt=excluded.StaleAt,
+            Snapshot=excluded.Snapshot''', (
+        tournament_id,
+        stale_at.isoformat(),
+        json.dumps(snapshot),
+    ))
+
+    # Tournaments without picks don't count towards the season.
+    season_totals = {}
+    if any(snapshot['Picks'].values()):
+        season_totals = snapshot['Totals']
+    update_season_results(conn, get_tournament_season(snapshot['Tournament']), tournament_id, season_totals)
+
+    conn.commit()
+
+    snapshot['Version'] = conn.execute('SELECT Version FROM results_snapshots WHERE TournamentID == ?', (
+        tournament_id,
+    )).fetchone()['Version']
+
+    return snapshot
+
+def refresh_results_snapshot(tournament_id):
+    with _db_write_lock:
+        save_results_snapshot(tournament_id)
+
+def get_results_state(tournament_id):
+    conn = get_db_connection()
+    state = conn.execute('''SELECT results_snapshots.Version, results_snapshots.StaleAt, strftime("%Y-%m-%d %H:%M:%S", tournaments.LeaderboardLastUpdated) AS LeaderboardLastUpdated
+        FROM results_snapshots JOIN tournaments ON tournaments.TournamentID == results_snapshots.TournamentID
+        WHERE results_snapshots.TournamentID == ?''', (
+        tournament_id,
+    )).fetchone()
+
+    return state
+
+def get_results_snapshot(tournament_id):
+    conn = get_db_connection()
+    row = conn.execute('''SELECT results_snapshots.Version, results_snapshots.Snapshot, results_snapshots.StaleAt, strftime("%Y-%m-%d %H:%M:%S", tournaments.LeaderboardLastUpdated) AS LeaderboardLastUpdated
+        FROM results_snapshots JOIN tournaments ON tournaments.TournamentID == results_snapshots.TournamentID
+        WHERE results_snapshots.TournamentID == ?''', (
+        tournament_id,
+    )).fetchone()
+
+    if row is None or datetime.fromisoformat(row['StaleAt']) <= datetime.now():
+        with _db_write_lock:
+            return save_results_snapshot(tournament_id)
+
+    # Polls that change nothing only move the tournament's last update time.
+    snapshot = json.loads(row['Snapshot'])
+    snapshot['LeaderboardLastUpdated'] = row['LeaderboardLastUpdated']
+    snapshot['Version'] = row['Version']
+
+    return snapshot
+
+_results_fragments = {}
+
+def get_results_fragments(tournament_id, snapshot):
+    # Every row of the results page rendered on its own, keyed by element id.
+    # Rendered once per snapshot version however many pages are watching.
+    cached = _results_fragments.get(tournament_id)
+    if cached is not None and cached[0] == snapshot['Version']:
+        return cached[1]
+
+    standing_row = get_template_attribute('results_rows.html', 'standing_row')
+    pick_row = get_template_attribute('results_rows.html', 'pick_row')
+    pick_total = get_template_attribute('results_rows.html', 'pick_total')
+    leaderboard_row = get_template_attribute('results_rows.html', 'leaderboard_row')
+
+    fragments = {}
+    for rank, (owner, points) in enumerate(snapshot['Totals'].items(), 1):
+        fragments['standing-{}'.format(rank)] = str(standing_row(rank, owner, points))
+
+    for owner_index, owner in enumerate(OWNERS):
+        for pick_index, player in enumerate(snapshot['Picks'][owner]):
+            fragments['pick-{}-{}'.format(owner_index, pick_index)] = str(pick_row(owner_index, pick_index, player))
+        fragments['total-{}'.format(owner_index)] = str(pick_total(owner_index, snapshot['Totals'][owner]))
+
+    for position, player in enumerate(snapshot['Leaderboard']):
+        fragments['leaderboard-{}'.format(position)] = str(leaderboard_row(position, player))
+
+    _results_fragments[tournament_id] = (snapshot['Version'], fragments)
+
+    return fragments
+
+def get_results_events(tournament_id, version):
+    # Sends the rows that changed since the snapshot version the page was
+    # rendered from. Pages that are too far behind to patch are told to reload.
+    yield 'retry: {}\n\n'.format(RESULTS_STREAM_RETRY * 1000)
+
+    fragments = None
+    last_updated = None
+    started = time.time()
+    while time.time() - started < RESULTS_STREAM_MAX_AGE:
+        state = get_results_state(tournament_id)
+        if state is None or fragments is None or state['Version'] != version or datetime.fromisoformat(state['StaleAt']) <= datetime.now():
+            snapshot = get_results_snapshot(tournament_id)
+            if snapshot is None:
+                return
+
+            new_fragments = get_results_fragments(tournament_id, snapshot)
+            if fragments is None and snapshot['Version'] == version:
+                fragments = new_fragments
+            elif fragments is None or fragments.keys() != new_fragments.keys():
+                yield 'event: reload\ndata: {}\n\n'
+                return
+            else:
+                patch = {}
+                for element_id, fragment in new_fragments.items():
+                    if fragments[element_id] != fragment:
+                        patch[element_id] = fragment
+
+                if patch:
+                    yield 'id: {}\nevent: patch\ndata: {}\n\n'.format(snapshot['Version'], json.dumps(patch))
+                fragments = new_fragments
+
+            version = snapshot['Version']
+            state = snapshot
+
+        if state['LeaderboardLastUpdated'] is not None and state['LeaderboardLastUpdated'] != last_updated:
+            _, total_seconds = get_last_updated_str(state)
+            yield 'event: updated\ndata: {}\n\n'.format(json.dumps({'Age': total_seconds}))
+            last_updated = state['LeaderboardLastUpdated']
+        else:
+            # Lets the server notice pages that have gone away.
+            yield ': keepalive\n\n'
+
+        time.sleep(RESULTS_STREAM_POLL_PERIOD)
+
+@app.route('/results')
+def results():
+    tournament_id = request.args.get('tournamentid', TOURNAMENT_ID, type=int)
+
+    snapshot = get_results_snapshot(tournament_id)
+    if snapshot is None:
+        abort(404)
+
+    # The page only changes with the snapshot and the leaderboard's update time.
+    # The age shown on it is corrected by the results stream as soon as it opens.
+    etag = hashlib.sha1('{}:{}:{}'.format(tournament_id, snapshot['Version'], snapshot['LeaderboardLastUpdated']).encode()).hexdigest()
+    last_modified = None
+    if snapshot['LeaderboardLastUpdated'] is not None:
+        last_modified = datetime.fromisoformat(snapshot['LeaderboardLastUpdated']).astimezone(timezone.utc)
+
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        last_updated_str, total_seconds = get_last_updated_str(snapshot)
+        response = make_response(render_template('results.html', leaderboard=snapshot['Leaderboard'], picks=snapshot['Picks'], totals=snapshot['Totals'], owners=OWNERS, last_updated=last_updated_str, total_seconds=total_seconds, tournament=snapshot['Tournament'], version=snapshot['Version']))
+    else:
+        response = Response(status=304)
+
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+
+    return response
+
+@app.route('/results/stream')
+def results_stream():
+    tournament_id = request.args.get('tournamentid', TOURNAMENT_ID, type=int)
+
+    # Reconnecting browsers report the last version they were sent.
+    version = request.headers.get('Last-Event-ID', type=int)
+    if version is None:
+        version = request.args.get('version', type=int)
+
+    response = Response(stream_with_context(get_results_events(tournament_id, version)), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+
+    return response
+
+def update_season_results(conn, season, tournament_id, totals):
+    # Moves each owner's season total by the change in their tournament total,
+    # so standings never need replaying. Callers commit.
+    previous_totals = {}
+    for row in conn.execute('SELECT Owner, Points FROM season_results WHERE TournamentID == ?', (tournament_id,)):
+        previous_totals[row['Owner']] = row['Points']
+
+    for owner in set(previous_totals) | set(totals):
+        previous_points = previous_totals.get(owner)
+        points = totals.get(owner)
+        if points == previous_points:
+            continue
+
+        if points is None:
+            conn.execute('DELETE FROM season_results WHERE TournamentID == ? AND Owner == ?', (tournament_id, owner))
+        else:
+            conn.execute('''INSERT INTO season_results (Season, TournamentID, Owner, Points) VALUES (?, ?, ?, ?)
+                ON CONFLICT (TournamentID, Owner) DO UPDATE SET Points=excluded.Points''', (
+                season,
+                tournament_id,
+                owner,
+                points,
+            ))
+
+        tournaments = (points is not None) - (previous_points is not None)
+        conn.execute('''INSERT INTO season_standings (Season, Owner, Points, Tournaments) VALUES (?, ?, ?, ?)
+            ON CONFLICT (Season, Owner) DO UPDATE SET
+                Points=ROUND(Points + excluded.Points, 2),
+                Tournaments=Tournaments + excluded.Tournaments''', (
+            season,
+            owner,
+            get_points_value((points or 0) - (previous_points or 0)),
+            tournaments,
+        ))
+
+def rebuild_season_standings():
+    conn = get_db_connection()
+    conn.execute('DELETE FROM season_results')
+    conn.execute('DELETE FROM season_standings')
+    conn.commit()
+
+    for row in conn.execute('SELECT DISTINCT TournamentID FROM picks').fetchall():
+        refresh_results_snapshot(row['TournamentID'])
+
+def get_season_standings(season):
+    conn = get_db_connection()
+    standings = []
+    for row in conn.execute('SELECT Owner, Points, Tournaments FROM season_standings WHERE Season == ? ORDER BY Points DESC, Owner', (season,)):
+        standing = dict(row)
+        standing['Points'] = get_points_value(standing['Points'])
+        standings.append(standing)
+
+    return standings
+
+def get_one_and_done_usage(season):
+    conn = get_db_connection()
+    player_index = get_player_index()
+
+    usage = {}
+    for owner in OWNERS:
+        usage[owner] = []
+
+    for row in conn.execute('SELECT Owner, PlayerID FROM one_and_done_usage WHERE Season == ? ORDER BY rowid', (season,)):
+        if row['Owner'] in usage:
+            usage[row['Owner']].append(get_player_profile(player_id=row['PlayerID'], player_index=player_index)['DraftKingsName'])
+
+    return usage
+
+def get_current_season():
+    season = get_tournament_season(get_tournament_from_id(TOURNAMENT_ID))
+    return season if season is not None else str(datetime.now().year)
+
+def print_season_standings(season):
+    table = PrettyTable()
+    table.field_names = ['Owner', 'Points', 'Tournaments']
+    for standing in get_season_standings(season):
+        table.add_row([standing['Owner'], standing['Points'], standing['Tournaments']])
+    print(table)
+
+@app.route('/season')
+def season():
+    selected_season = request.args.get('season', get_current_season())
+
+    return render_template('season.html', season=selected_season, standings=get_season_standings(selected_season), one_and_dones=get_one_and_done_usage(selected_season), owners=OWNERS)
 
 @app.route('/tournaments')
 def tournaments():
@@ -781,74 +1920,210 @@ def tournaments():
 
 #     return render_template('picks.html', players=players, tournaments=relevant_tournaments, tournamentid=tournament_id, selected_string=selected_string)
 
-def create_leaderboard_table():
+_leaderboard_snapshots = {}
+
+def get_leaderboard_signature(conn, tournament_id):
+    # Changes whenever anyone writes or clears the tournament's leaderboard.
+    signature = conn.execute('SELECT (SELECT LeaderboardLastUpdated FROM tournaments WHERE TournamentID == ?), (SELECT COUNT(*) FROM leaderboards WHERE TournamentID == ?)', (
+        tournament_id,
+        tournament_id,
+    )).fetchone()
+
+    return tuple(signature)
+
+def get_leaderboard_snapshot(tournament_id):
+    # Last written values per PlayerID. Reseeded from the database whenever
+    # the leaderboard was changed by anything other than this process's last
+    # update, such as clear-leaderboard run from another process.
     conn = get_db_connection()
-    curr = conn.cursor()
-    curr.execute('DROP TABLE IF EXISTS leaderboards;')
-    curr.execute('''
-        CREATE TABLE leaderboards (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            TournamentID INTEGER NOT NULL,
-            PlayerID TEXT NOT NULL,
-            Rank TEXT NOT NULL,
-            DraftKingsPlayerID TEXT NOT NULL,
-            DraftKingsName TEXT NOT NULL,
-            Points TEXT NOT NULL,
-            OneAndDonePoints TEXT NOT NULL,
-            Position INTEGER NOT NULL,
-            TotalThrough TEXT,
-            TeeTime TEXT
-        );
-    ''')
-    conn.commit()
-    conn.close()
+    signature = get_leaderboard_signature(conn, tournament_id)
+
+    cached = _leaderboard_snapshots.get(tournament_id)
+    if cached is not None and cached[0] == signature:
+        snapshot = cached[1]
+    else:
+        rows = conn.execute('SELECT PlayerID, Rank, Points, OneAndDonePoints, Position, TotalThrough, TeeTime FROM leaderboards WHERE TournamentID == ?', (
+            tournament_id,
+        )).fetchall()
+
+        snapshot = {}
+        for row in rows:
+            snapshot[row['PlayerID']] = tuple(row)[1:]
+        _leaderboard_snapshots[tournament_id] = (signature, snapshot)
+
+    return snapshot
+
+def get_leaderboard_changes(snapshot, parsed_leaderboard):
+    changes = []
+    for position, player in enumerate(parsed_leaderboard):
+        player_id = player['PlayerID']
+        values = (
+            player['Rank'],
+            player['Points'],
+            player['OneAndDonePoints'],
+            position,
+            player['TotalThrough'],
+            player['TeeTime'],
+        )
+
+        previous = snapshot.get(player_id)
+        if values != previous:
+            changes.append({
+                'PlayerID'          : player_id,
+                'DraftKingsPlayerID': player['DraftKingsPlayerID'],
+                'DraftKingsName'    : player['DraftKingsName'] if player['DraftKingsName'] is not None else 'Unknown',
+                'Previous'          : previous,
+                'Current'           : values,
+            })
+
+    return changes
+
+def print_leaderboard_changes(tournament_id, changes, num_players):
+    print('Leaderboard {}: {} of {} players changed'.format(tournament_id, len(changes), num_players))
+    for change in changes:
+        rank = change['Current'][0]
+        if change['Previous'] is None:
+            print('    {:30} new at {}'.format(change['DraftKingsName'], rank))
+        elif change['Previous'][0] != rank:
+            print('    {:30} {} -> {}'.format(change['DraftKingsName'], change['Previous'][0], rank))
 
 def update_leaderboard(tournament_id, leaderboard=None):
     if leaderboard is None:
-        leaderboard = api_get_leaderboard(tournament_id)
-    player_profiles = load_player_profiles()
-    parsed_leaderboard = parse_leaderboard(leaderboard, player_profiles)
+        leaderboard = api_get_leaderboard_players(tournament_id)
+    rules = get_scoring_rules(get_tournament_season(get_tournament_from_id(tournament_id)))
+    parsed_leaderboard = parse_leaderboard(leaderboard, get_player_index(), rules, rules.is_major(tournament_id))
+
+    snapshot = get_leaderboard_snapshot(tournament_id)
+    changes = get_leaderboard_changes(snapshot, parsed_leaderboard)
+
+    rows = []
+    for change in changes:
+        rank, points, one_and_done_points, position, total_through, tee_time = change['Current']
+        rows.append((
+            tournament_id,
+            change['PlayerID'],
+            rank,
+            change['DraftKingsPlayerID'],
+            change['DraftKingsName'],
+            points,
+            one_and_done_points,
+            position,
+            total_through,
+            tee_time,
+        ))
+
+    polled_at = datetime.now()
 
     conn = get_db_connection()
+    with _db_write_lock:
+        write_leaderboard_rows(conn, tournament_id, rows, polled_at)
+        if changes:
+            append_leaderboard_history(conn, tournament_id, polled_at, encode_leaderboard_delta(changes))
+        conn.commit()
+
+        for change in changes:
+            snapshot[change['PlayerID']] = change['Current']
+        _leaderboard_snapshots[tournament_id] = (get_leaderboard_signature(conn, tournament_id), snapshot)
+
+        if changes:
+            save_results_snapshot(tournament_id)
+
+    print_leaderboard_changes(tournament_id, changes, len(parsed_leaderboard))
+
+    return changes
+
+def write_leaderboard_rows(conn, tournament_id, rows, polled_at):
     curr = conn.cursor()
 
-    for position, player in enumerate(parsed_leaderboard):
-        db_player = conn.execute('SELECT id FROM leaderboards WHERE TournamentID == ? AND PlayerID == ?', (
-            tournament_id,
-            player['PlayerID']
-        )).fetchall()
-        if len(db_player) == 0:
-            curr.execute('INSERT INTO leaderboards (TournamentID, PlayerID, Rank, DraftKingsPlayerID, DraftKingsName, Points, OneAndDonePoints, Position, TotalThrough, TeeTime) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', (
-                tournament_id,
-                player['PlayerID'],
-                player['Rank'],
-                player['DraftKingsPlayerID'] if player['DraftKingsPlayerID'] is not None else 'Unknown',
-                player['DraftKingsName'] if player['DraftKingsName'] is not None else 'Unknown',
-                player['Points'],
-                player['OneAndDonePoints'],
-                position,
-                player['TotalThrough'],
-                player['TeeTime'],
-            ))
-        else:
-            curr.execute('UPDATE leaderboards SET Rank=?, Points=?, OneAndDonePoints=?, Position=?, TotalThrough=?, TeeTime=? WHERE TournamentID==? AND PlayerID==?', (
-                player['Rank'],
-                player['Points'],
-                player['OneAndDonePoints'],
-                position,
-                player['TotalThrough'],
-                player['TeeTime'],
-                tournament_id,
-                player['PlayerID'],
-            ))
+    curr.executemany('''INSERT INTO leaderboards (TournamentID, PlayerID, Rank, DraftKingsPlayerID, DraftKingsName, Points, OneAndDonePoints, Position, TotalThrough, TeeTime) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (TournamentID, PlayerID) DO UPDATE SET
+            Rank=excluded.Rank,
+            Points=excluded.Points,
+            OneAndDonePoints=excluded.OneAndDonePoints,
+            Position=excluded.Position,
+            TotalThrough=excluded.TotalThrough,
+            TeeTime=excluded.TeeTime''', rows)
 
     curr.execute('UPDATE tournaments SET LeaderboardLastUpdated=? WHERE TournamentID=?', (
-        datetime.now(),
+        polled_at,
         tournament_id,
     ))
 
-    conn.commit()
-    conn.close()
+def encode_leaderboard_delta(changes):
+    # Only the players a poll changed, one list per column, compressed.
+    columns = {'PlayerID': [change['PlayerID'] for change in changes]}
+    for i, column in enumerate(LEADERBOARD_HISTORY_COLUMNS[1:]):
+        columns[column] = [change['Current'][i] for change in changes]
+
+    return zlib.compress(json.dumps(columns, separators=(',', ':')).encode(), 9)
+
+def append_leaderboard_history(conn, tournament_id, polled_at, delta):
+    conn.execute('INSERT INTO leaderboard_history (TournamentID, PolledAt, Delta) VALUES (?, ?, ?)', (
+        tournament_id,
+        polled_at.isoformat(),
+        delta,
+    ))
+
+def iter_leaderboard_history(tournament_id, when=None):
+    # Yields (polled at, players) after every stored poll, oldest first, where
+    # players maps PlayerID to that player's columns as of the poll.
+    conn = get_db_connection()
+    if when is None:
+        when = datetime.now()
+    if isinstance(when, datetime):
+        when = when.isoformat()
+
+    history = conn.execute('SELECT PolledAt, Delta FROM leaderboard_history WHERE TournamentID == ? AND PolledAt <= ? ORDER BY id', (
+        tournament_id,
+        when,
+    ))
+
+    players = {}
+    for polled_at, delta in history:
+        columns = json.loads(zlib.decompress(delta))
+        if columns.get('Reset'):
+            players = {}
+        else:
+            for i, player_id in enumerate(columns['PlayerID']):
+                players[player_id] = {column: columns[column][i] for column in LEADERBOARD_HISTORY_COLUMNS}
+
+        yield polled_at, players
+
+def get_leaderboard_at(tournament_id, when):
+    players = {}
+    for polled_at, players in iter_leaderboard_history(tournament_id, when):
+        pass
+
+    player_index = get_player_index()
+
+    leaderboard = sorted(players.values(), key=operator.itemgetter('Position'))
+    for player in leaderboard:
+        player['DraftKingsName'] = get_player_profile(player_id=player['PlayerID'], player_index=player_index)['DraftKingsName']
+
+    return leaderboard
+
+def get_player_rank_history(tournament_id, player_id):
+    # (polled at, rank) for each poll that moved the player.
+    rank_history = []
+    for polled_at, players in iter_leaderboard_history(tournament_id):
+        player = players.get(player_id)
+        rank = player['Rank'] if player is not None else None
+        if not rank_history or rank_history[-1][1] != rank:
+            rank_history.append((polled_at, rank))
+
+    return rank_history
+
+def print_leaderboard_at(tournament_id, when):
+    table = PrettyTable()
+    table.field_names = ['Rank', 'Player', 'Points', 'Thru']
+    for player in get_leaderboard_at(tournament_id, when):
+        table.add_row([
+            player['Rank'] if player['Rank'] is not None else '-',
+            player['DraftKingsName'],
+            player['Points'],
+            player['TotalThrough'] if player['TotalThrough'] is not None else '-',
+        ])
+    print(table)
 
 def get_leaderboard(tournament_id):
     conn = get_db_connection()
@@ -863,57 +2138,53 @@ def get_leaderboard(tournament_id):
     )).fetchall()[0]
 
     conn.commit()
-    conn.close()
 
     return leaderboard, last_updated
 
-def create_picks_table():
-    # TODO: convert all appropriate table TEXTs to INTEGERs
-    conn = get_db_connection()
-    curr = conn.cursor()
-    curr.execute('DROP TABLE IF EXISTS picks;')
-    curr.execute('''
-        CREATE TABLE picks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            Owner TEXT NOT NULL,
-            TournamentID INTEGER NOT NULL,
-            PlayerID INTEGER NOT NULL,
-            OneAndDone INTEGER NOT NULL
-        );
-    ''')
-    conn.commit()
-    conn.close()
-
 def add_pick(owner, tournament_id, player_name, one_and_done=False):
     conn = get_db_connection()
     curr = conn.cursor()
 
-    # TODO: load player profiles once
-    player_profiles = load_player_profiles()
-    player_id = get_player_id_from_name(player_name, player_profiles)
+    player_id = get_player_id_from_name(player_name)
 
-    if player_id is not None:
-        curr.execute('INSERT INTO picks (Owner, TournamentID, PlayerID, OneAndDone) VALUES (?, ?, ?, ?)', (owner, tournament_id, player_id, one_and_done))
-    else:
+    if player_id is None:
         print('No player ID for {}. Cannot add to picks.'.format(player_name))
+        return
+
+    if one_and_done:
+        # Each player can only be an owner's One-N-Done once a season.
+        season = get_tournament_season(get_tournament_from_id(tournament_id))
+        used = curr.execute('SELECT TournamentID FROM one_and_done_usage WHERE Season == ? AND Owner == ? AND PlayerID == ?', (
+            season,
+            owner,
+            player_id,
+        )).fetchone()
+
+        if used is not None and used['TournamentID'] != tournament_id:
+            print('{} already used {} as a One-N-Done in tournament {}. Cannot add to picks.'.format(owner, player_name, used['TournamentID']))
+            return
+
+        curr.execute('INSERT OR IGNORE INTO one_and_done_usage (Season, Owner, PlayerID, TournamentID) VALUES (?, ?, ?, ?)', (season, owner, player_id, tournament_id))
+
+    curr.execute('INSERT INTO picks (Owner, TournamentID, PlayerID, OneAndDone) VALUES (?, ?, ?, ?)', (owner, tournament_id, player_id, one_and_done))
 
     conn.commit()
-    conn.close()
 
-def add_picks():
+def add_picks(tournament_id):
     conn = get_db_connection()
     curr = conn.cursor()
 
     for owner in OWNERS:
         # Add picks
         for pick in PICKS[owner]:
-            add_pick(owner, TOURNAMENT_ID, pick)
+            add_pick(owner, tournament_id, pick)
 
         # # Add One-N-Done
-        # add_pick(owner, TOURNAMENT_ID, ONE_N_DONES[owner], True)
+        # add_pick(owner, tournament_id, ONE_N_DONES[owner], True)
 
     conn.commit()
-    conn.close()
+
+    refresh_results_snapshot(tournament_id)
 
 def get_picks(tournament_id):
     conn = get_db_connection()
@@ -921,13 +2192,12 @@ def get_picks(tournament_id):
 
     picks = {}
     for owner in OWNERS:
-        picks[owner] = conn.execute('SELECT * FROM picks WHERE Owner == ? and TournamentID == ?', (
+        picks[owner] = conn.execute('SELECT * FROM picks WHERE Owner == ? and TournamentID == ? ORDER BY id', (
             owner,
             tournament_id,
         )).fetchall()
 
     conn.commit()
-    conn.close()
 
     return picks
 
@@ -977,90 +2247,239 @@ def get_last_tee_time(leaderboard, round_num):
 
     return last_tee_time
 
-def manage_leaderboard(tournament_id, starting_round_num=1):
-    round_num = starting_round_num
+def get_round_tee_times(leaderboard, round_num):
+    tee_times = []
+    for player in leaderboard['Players']:
+        if len(player['Rounds']) >= round_num:
+            tee_time = convert_tee_time(player['Rounds'][round_num-1]['TeeTime'])
+            if tee_time is not None:
+                tee_times.append(tee_time)
+
+    tee_times.sort()
+    return tee_times
+
+def get_players_on_course(leaderboard):
+    players_on_course = 0
+    for player in leaderboard['Players']:
+        if player['TotalThrough'] is not None:
+            players_on_course += 1
+
+    return players_on_course
+
+def is_round_complete(leaderboard, round_num, now):
+    last_tee_time = get_last_tee_time(leaderboard, round_num)
+    if last_tee_time is not None and last_tee_time > now:
+        print('Now: {}, Last Tee Time: {}. Last tee time not reached.'.format(now.strftime("%Y-%m-%d %H:%M:%S"), last_tee_time))
+        return False
+
+    players_on_course = get_players_on_course(leaderboard)
+    if players_on_course > 0:
+        print('Waiting for {} players to complete round.'.format(players_on_course))
+        return False
+
+    return True
+
+def get_poll_period(leaderboard, round_num, changes, now):
+    tee_times = get_round_tee_times(leaderboard, round_num)
+    if not tee_times:
+        print('Tee times are not posted for round {}!'.format(round_num))
+        return ROUND_END_SLEEP_PERIOD
+
+    upcoming_tee_times = [tee_time for tee_time in tee_times if tee_time > now]
+    players_on_course = get_players_on_course(leaderboard)
+
+    # Nothing can change before the next group tees off, whether that is the
+    # start of the round or the gap between the morning and afternoon waves.
+    if players_on_course == 0 and upcoming_tee_times:
+        print('Now: {}, Next Tee Time: {}.'.format(now.strftime("%Y-%m-%d %H:%M:%S"), upcoming_tee_times[0]))
+        return max(LEADERBOARD_MIN_POLL_PERIOD, int((upcoming_tee_times[0] - now).total_seconds()))
+
+    # Poll faster the more of the field is playing, about to tee off, or moved
+    # since the last poll.
+    teeing_off = 0
+    for tee_time in upcoming_tee_times:
+        if (tee_time - now).total_seconds() > LEADERBOARD_UPDATE_PERIOD:
+            break
+        teeing_off += 1
+
+    field_size = len(tee_times)
+    activity = max((players_on_course + teeing_off) / field_size, len(changes) / field_size)
+    activity = min(activity, 1)
+
+    return int(LEADERBOARD_UPDATE_PERIOD - activity * (LEADERBOARD_UPDATE_PERIOD - LEADERBOARD_MIN_POLL_PERIOD))
+
+_leaderboard_shutdown = threading.Event()
+_leaderboard_wakeup = threading.Event()
+
+def request_leaderboard_shutdown(signum=None, frame=None):
+    print('Shutting down leaderboard manager...')
+    _leaderboard_shutdown.set()
+    _leaderboard_wakeup.set()
+
+def request_leaderboard_poll(signum=None, frame=None):
+    _leaderboard_wakeup.set()
+
+def wait_for_next_poll(seconds):
+    # Returns False once a shutdown has been requested. A poll request cuts the
+    # wait short without stopping the manager.
+    if not _leaderboard_shutdown.is_set():
+        print('Sleeping for {} seconds'.format(seconds))
+        _leaderboard_wakeup.wait(seconds)
+        _leaderboard_wakeup.clear()
+
+    return not _leaderboard_shutdown.is_set()
+
+def install_leaderboard_signal_handlers():
+    # Signal handlers can only be installed from the main thread.
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGINT, request_leaderboard_shutdown)
+        signal.signal(signal.SIGTERM, request_leaderboard_shutdown)
+        signal.signal(signal.SIGUSR1, request_leaderboard_poll)
+
+def get_leaderboard_checkpoint_path(tournament_id):
+    return os.path.join(LEADERBOARD_CHECKPOINT_DIR, 'leaderboard_{}.json'.format(tournament_id))
+
+def load_leaderboard_checkpoint(tournament_id):
+    try:
+        with open(get_leaderboard_checkpoint_path(tournament_id), 'r') as input_file:
+            return json.load(input_file)
+    except (OSError, ValueError):
+        return None
+
+def save_leaderboard_checkpoint(tournament_id, round_num, picks_updated, next_poll):
+    os.makedirs(LEADERBOARD_CHECKPOINT_DIR, exist_ok=True)
+
+    checkpoint = {
+        'TournamentID'  : tournament_id,
+        'RoundNum'      : round_num,
+        'PicksUpdated'  : picks_updated,
+        'NextPoll'      : next_poll.isoformat(),
+    }
+
+    path = get_leaderboard_checkpoint_path(tournament_id)
+    temp_path = '{}.{}.{}.tmp'.format(path, os.getpid(), threading.get_ident())
+    with open(temp_path, 'w') as output_file:
+        json.dump(checkpoint, output_file)
+    os.replace(temp_path, path)
+
+def clear_leaderboard_checkpoint(tournament_id):
+    try:
+        os.remove(get_leaderboard_checkpoint_path(tournament_id))
+    except FileNotFoundError:
+        pass
+
+def manage_leaderboard(tournament_id, starting_round_num=None, fetch_profiles=True):
+    # Picks are only locked in when the manager is watching the first round of
+    # the tournament PICKS were made for.
+    checkpoint = load_leaderboard_checkpoint(tournament_id)
+    next_poll = None
+    if starting_round_num is not None:
+        round_num = starting_round_num
+        picks_updated = starting_round_num != 1
+    elif checkpoint is not None:
+        round_num = checkpoint['RoundNum']
+        picks_updated = checkpoint['PicksUpdated']
+        next_poll = datetime.fromisoformat(checkpoint['NextPoll'])
+        print('Resuming round {} of {} from checkpoint.'.format(round_num, tournament_id))
+    else:
+        round_num = 1
+        picks_updated = False
+
+    if tournament_id != TOURNAMENT_ID:
+        picks_updated = True
+
+    install_leaderboard_signal_handlers()
+
+    # A restart doesn't poll any sooner than the run it replaces would have.
+    if next_poll is not None and next_poll > datetime.now():
+        if not wait_for_next_poll(int((next_poll - datetime.now()).total_seconds())):
+            print('Leaderboard manager for {} stopped in round {}.'.format(tournament_id, round_num))
+            return
 
     first_iteration = True
-    fetch_player_profiles()
-    # TODO: uncomment if I ever get access to the headshots service. I got lucky and magically got access to the headshots for one fetch. But my access was blocked on the 2nd attempt.
-    # fetch_headshots()
-    leaderboard = api_get_leaderboard(tournament_id)
+    # TODO: add fetch_headshots if I ever get access to the headshots service. I got lucky and magically got access to the headshots for one fetch. But my access was blocked on the 2nd attempt.
+    # The full leaderboard is only read here, for the round count, so it isn't
+    # kept for revalidation. Polls fetch just the players.
+    if fetch_profiles:
+        _, leaderboard = api_get_many([
+            (fetch_player_profiles, ()),
+            (api_get_leaderboard  , (tournament_id, False)),
+        ])
+    else:
+        leaderboard = api_get_leaderboard(tournament_id, False)
     num_rounds = len(leaderboard['Tournament']['Rounds'])
 
-    prev_players_remaining = None
     while round_num <= num_rounds:
         if not first_iteration:
-            leaderboard = api_get_leaderboard(tournament_id)
-        update_leaderboard(tournament_id, leaderboard)
-
-        if (first_iteration and starting_round_num == 1):
-            wait_for_round_start(leaderboard, round_num, True)
-        else:
-            wait_for_round_start(leaderboard, round_num, False)
+            leaderboard = api_get_leaderboard_players(tournament_id)
+        changes = update_leaderboard(tournament_id, leaderboard)
 
-        round_complete = True
-        last_tee_time = get_last_tee_time(leaderboard, round_num)
         now = datetime.now()
-        if last_tee_time is not None and last_tee_time > now:
-            print('Now: {}, Last Tee Time: {}. Last tee time not reached.'.format(now.strftime("%Y-%m-%d %H:%M:%S"), last_tee_time))
-            round_complete = False
-        else:
-            players_remaining = 0
-            for player in leaderboard['Players']:
-                if player['TotalThrough'] is not None:
-                    players_remaining += 1
-
-            if players_remaining > 0:
-
-                print('Waiting for {} players to complete round.'.format(players_remaining))
-                round_complete = False
+        first_tee_time = get_first_tee_time(leaderboard, round_num)
+        if not picks_updated and first_tee_time is not None and first_tee_time <= now:
+            update_picks(tournament_id)
+            picks_updated = True
 
-            prev_players_remaining = players_remaining
-
-        if round_complete:
+        if is_round_complete(leaderboard, round_num, now):
             print('Round {} is over.'.format(round_num))
             round_num += 1
-            print('Sleeping for {} seconds'.format(ROUND_END_SLEEP_PERIOD))
-            time.sleep(ROUND_END_SLEEP_PERIOD)
-        else:
-            print('Sleeping for {} seconds'.format(LEADERBOARD_UPDATE_PERIOD))
-            time.sleep(LEADERBOARD_UPDATE_PERIOD)
+            if round_num > num_rounds:
+                break
+
+        poll_period = get_poll_period(leaderboard, round_num, changes, now)
+        save_leaderboard_checkpoint(tournament_id, round_num, picks_updated, now + timedelta(seconds=poll_period))
+
+        if not wait_for_next_poll(poll_period):
+            print('Leaderboard manager for {} stopped in round {}.'.format(tournament_id, round_num))
+            return
 
         first_iteration = False
 
-def wait_for_round_start(leaderboard, round_num, do_update_picks):
-    first_tee_time = get_first_tee_time(leaderboard, round_num)
+    clear_leaderboard_checkpoint(tournament_id)
 
-    if first_tee_time is None:
-        print('Tee times are not posted for round {}!'.format(round_num))
-    else:
-        now = datetime.now()
-        if now < first_tee_time:
-            sleep_timedelta = first_tee_time - now
-            sleep_seconds = int(sleep_timedelta.total_seconds())
-            print('Now: {}, First Tee Time: {}. Sleeping for {} seconds...'.format(now.strftime("%Y-%m-%d %H:%M:%S"), first_tee_time, sleep_seconds))
-            time.sleep(sleep_seconds)
+def run_leaderboard_manager(tournament_id):
+    try:
+        manage_leaderboard(tournament_id, fetch_profiles=False)
+    finally:
+        release_db_connection()
+
+def manage_active_leaderboards():
+    # One manager thread per tournament in progress. They share the API session,
+    # its concurrency and rate limits, and the database write lock.
+    install_leaderboard_signal_handlers()
+
+    managers = {}
+    while not _leaderboard_shutdown.is_set():
+        # Profiles are fetched once here for every manager started this pass.
+        new_tournaments = [tournament for tournament in get_active_tournaments() if tournament['TournamentID'] not in managers]
+        if new_tournaments:
+            fetch_player_profiles()
+
+        for tournament in new_tournaments:
+            tournament_id = tournament['TournamentID']
+            print('Managing leaderboard for {} ({})'.format(tournament['Name'], tournament_id))
+            manager = threading.Thread(target=run_leaderboard_manager, args=(tournament_id,), name='leaderboard-{}'.format(tournament_id))
+            manager.start()
+            managers[tournament_id] = manager
 
-        if do_update_picks:
-            update_picks()
+        _leaderboard_shutdown.wait(ROUND_END_SLEEP_PERIOD)
 
-def update_picks():
+    for manager in managers.values():
+        manager.join()
+
+def update_picks(tournament_id):
     print('Updating picks...')
-    create_picks_table()
-    add_picks()
+    clear_picks(tournament_id)
+    add_picks(tournament_id)
 
 def get_players(tournament_id):
-    player_profiles = load_player_profiles()
-
     salaries = get_salaries(tournament_id)
 
     players = []
     for salary in salaries:
-        player_profile = get_player_profile(player_id=salary['PlayerID'], player_profiles=player_profiles)
-
         if salary['DraftKingsSalary'] is not None:
             player = {
-                'DraftKingsName'    : player_profile['DraftKingsName'],
+                'DraftKingsName'    : salary['DraftKingsName'] if salary['DraftKingsName'] is not None else salary['OperatorPlayerName'],
                 'DraftKingsSalary'  : salary['DraftKingsSalary'],
                 'FantasyPoints'     : salary['FantasyPoints'],
                 'Value'             : 1e6 * (float(salary['FantasyPoints']) / float(salary['DraftKingsSalary'])),
@@ -1069,93 +2488,99 @@ def get_players(tournament_id):
 
     return players
 
-def get_starting_roster(players):
-    max_fantasy_points = 0
-    max_players = None
-    for i in range(1000000):
-        sys.stdout.write('{}\r'.format(i))
-        sys.stdout.flush()
-
-        selected_players = random.sample(players, NUM_PICKS)
-
-        total_fantasy_points = sum([player['FantasyPoints'] for player in selected_players])
-        total_salary         = sum([player['DraftKingsSalary'] for player in selected_players])
-        if (total_salary <= MAX_SALARY and total_fantasy_points > max_fantasy_points):
-            max_fantasy_points  = total_fantasy_points
-            max_players         = selected_players
-            print('\nTotal Salary: {:5}, Fantasy Points: {:0.3f}, Players: {}'.format(
-                total_salary,
-                total_fantasy_points,
-                ', '.join([player['DraftKingsName'] for player in selected_players])
-            ))
-
-    return max_players
-
-def get_roster(players):
-    starting_roster = get_starting_roster(players)
-
-    print()
-    print()
-    print('Starting Roster')
-    for player in starting_roster:
-        print('{:30}, Salary: {:5}, Value: {:.3f}'.format(player['DraftKingsName'], player['DraftKingsSalary'], player['Value']))
-    print('Points: {:.3f}'.format(sum([player['FantasyPoints'] for player in starting_roster])))
-    print('Salary: {:5}'.format(sum([player['DraftKingsSalary'] for player in starting_roster])))
-    print()
-
-    final_roster = []
-    for player in starting_roster:
-        print('{:30}, Salary: {:5}, Value: {:.3f}'.format(player['DraftKingsName'], player['DraftKingsSalary'], player['Value']))
-
-        prospects = [prospect for prospect in players if prospect['DraftKingsSalary'] == player['DraftKingsSalary']]
-
-        dedup_prospects = []
-        for prospect in prospects:
-            found = False
-
-            if prospect['DraftKingsName'] == player['DraftKingsName']:
-                found = True
+def get_player_pool(tournament_id):
+    return PlayerPool(get_players(tournament_id))
+
+def get_salary_unit(pool):
+    # Salaries are priced in round amounts, so the search can work in units of
+    # their greatest common divisor instead of single dollars.
+    return int(np.gcd.reduce(np.append(pool.salaries, MAX_SALARY)))
+
+def get_roster_table(pool):
+    salary_unit = get_salary_unit(pool)
+    budget = MAX_SALARY // salary_unit
+    costs = pool.salaries // salary_unit
+
+    # best[i, r, b] is the most points available from players i onwards when
+    # picking exactly r of them with at most b salary units to spend.
+    best = np.full((len(pool) + 1, NUM_PICKS + 1, budget + 1), INFEASIBLE, dtype=np.int64)
+    best[len(pool), 0, :] = 0
+
+    for i in range(len(pool) - 1, -1, -1):
+        cost = costs[i]
+        best[i] = best[i + 1]
+
+        if cost <= budget:
+            take = best[i + 1, :-1, :budget + 1 - cost]
+            take = np.where(take == INFEASIBLE, INFEASIBLE, take + pool.gains[i])
+            best[i, 1:, cost:] = np.maximum(best[i, 1:, cost:], take)
+
+    # The search below indexes single cells, which is much faster on lists.
+    return costs.tolist(), pool.gains.tolist(), budget, best.tolist()
+
+def get_top_lineups(pool, num_lineups, max_overlap=NUM_PICKS-1):
+    costs, gains, budget, best = get_roster_table(pool)
+
+    # Best-first search over take/skip decisions. The table gives the exact best
+    # completion of every partial lineup, so complete lineups come off the heap
+    # in descending order of points, ties broken by player index. Partial
+    # lineups sort ahead of complete ones with the same bound so that every tie
+    # is on the heap before the first of them is taken.
+    heap = []
+    if best[0][NUM_PICKS][budget] != INFEASIBLE:
+        heap.append((-best[0][NUM_PICKS][budget], 0, (), 0, NUM_PICKS, budget, 0, 0))
+
+    # The bound ignores overlap, so with a small max_overlap most of the heap is
+    # partial lineups that clash with accepted ones. The node budget keeps that
+    # from running on for minutes.
+    lineups = []
+    lineup_masks = []
+    nodes = 0
+    while heap and len(lineups) < num_lineups and nodes < LINEUP_SEARCH_MAX_NODES:
+        nodes += 1
+        bound, complete, picked, i, remaining_picks, remaining_budget, total, mask = heapq.heappop(heap)
+
+        # Overlap only grows as players are added, so a partial lineup that
+        # already shares too many players with an accepted one is a dead end.
+        if any((mask & lineup_mask).bit_count() > max_overlap for lineup_mask in lineup_masks):
+            continue
+
+        if complete:
+            lineups.append(picked)
+            lineup_masks.append(mask)
+            continue
+
+        cost = costs[i]
+        if cost <= remaining_budget and best[i + 1][remaining_picks - 1][remaining_budget - cost] != INFEASIBLE:
+            take_total = total + gains[i]
+            take_mask = mask | (1 << i)
+            if remaining_picks == 1:
+                heapq.heappush(heap, (-take_total, 1, picked + (i,), i + 1, 0, remaining_budget - cost, take_total, take_mask))
             else:
-                for final_player in final_roster:
-                    if prospect['DraftKingsName'] == final_player['DraftKingsName']:
-                        found = True
-
-            if not found:
-                dedup_prospects.append(prospect)
+                take_bound = take_total + best[i + 1][remaining_picks - 1][remaining_budget - cost]
+                heapq.heappush(heap, (-take_bound, 0, picked + (i,), i + 1, remaining_picks - 1, remaining_budget - cost, take_total, take_mask))
 
-        prospects = dedup_prospects
-        prospects = sorted(prospects, key=lambda x: x['Value'], reverse=True)
+        if best[i + 1][remaining_picks][remaining_budget] != INFEASIBLE:
+            skip_bound = total + best[i + 1][remaining_picks][remaining_budget]
+            heapq.heappush(heap, (-skip_bound, 0, picked, i + 1, remaining_picks, remaining_budget, total, mask))
 
-        for prospect in prospects:
-            print('    Prospect: {}, Salary: {:5}, Value: {:.3f}'.format(prospect['DraftKingsName'], prospect['DraftKingsSalary'], prospect['Value']))
-
-        # print(prospects)
-        if (len(prospects) > 0):
-            if prospects[0]['Value'] > player['Value']:
-                final_roster.append(prospects[0])
-            else:
-                final_roster.append(player)
+    if len(lineups) < num_lineups:
+        if heap:
+            print('Stopped the roster search after {} nodes with {} of {} rosters found. A larger max overlap searches much faster.'.format(nodes, len(lineups), num_lineups))
         else:
-            final_roster.append(player)
+            print('Only {} rosters of {} players fit under {} with at most {} players shared'.format(len(lineups), NUM_PICKS, MAX_SALARY, max_overlap))
 
-    print()
-    print('Final Roster')
-    for player in final_roster:
-        print('{:30}, Salary: {:5}, Value: {:.3f}'.format(player['DraftKingsName'], player['DraftKingsSalary'], player['Value']))
-    print('Total Points: {:.3f}'.format(sum([player['FantasyPoints'] for player in final_roster])))
-    print('Total Salary: {:5}'.format(sum([player['DraftKingsSalary'] for player in final_roster])))
+    return lineups
 
-    roster = Roster(final_roster)
+def get_rosters(pool, num_rosters, max_overlap=NUM_PICKS-1):
+    lineups = get_top_lineups(pool, num_rosters, max_overlap)
 
-    return roster
+    return [Roster(pool, lineup) for lineup in lineups]
 
-def autopick(tournament_id, num_rosters):
-    players = get_players(tournament_id)
+def autopick(tournament_id, num_rosters, max_overlap=NUM_PICKS-1):
+    pool = get_player_pool(tournament_id)
 
-    rosters = []
-    for _ in range(num_rosters):
-        roster = get_roster(players)
-        rosters.append(roster)
+    rosters = get_rosters(pool, num_rosters, max_overlap)
 
     rosters.sort(key=lambda x: x.total_points, reverse=True)
 
@@ -1167,35 +2592,25 @@ def autopick(tournament_id, num_rosters):
     for roster in rosters:
         print(roster)
 
-def values(tournament_id):
-    players = get_players(tournament_id)
-    players = sorted(players, key=lambda x: x['Value'], reverse=True)
-
+def print_player_pool(pool, order):
     table = PrettyTable()
     table.field_names = ['Player', 'FantasyPoints', 'Salary', 'Value']
-    for player in players:
+    for i in order:
         table.add_row([
-            player['DraftKingsName'],
-            player['FantasyPoints'],
-            player['DraftKingsSalary'],
-            '{:.3f}'.format(player['Value']),
+            pool.names[i],
+            pool.fantasy_points[i],
+            pool.salaries[i],
+            '{:.3f}'.format(pool.values[i]),
         ])
     print(table)
 
-def points(tournament_id):
-    players = get_players(tournament_id)
-    players = sorted(players, key=lambda x: x['FantasyPoints'], reverse=True)
+def values(tournament_id):
+    pool = get_player_pool(tournament_id)
+    print_player_pool(pool, np.argsort(-pool.values, kind='stable'))
 
-    table = PrettyTable()
-    table.field_names = ['Player', 'FantasyPoints', 'Salary', 'Value']
-    for player in players:
-        table.add_row([
-            player['DraftKingsName'],
-            player['FantasyPoints'],
-            player['DraftKingsSalary'],
-            '{:.3f}'.format(player['Value']),
-        ])
-    print(table)
+def points(tournament_id):
+    pool = get_player_pool(tournament_id)
+    print_player_pool(pool, np.argsort(-pool.fantasy_points, kind='stable'))
 
 def sandbox():
     headshots = api_get_headshots()
@@ -1203,42 +2618,53 @@ def sandbox():
 
 def main():
     args = parse_args()
+    tournament_id = args.tournament_id if args.tournament_id is not None else TOURNAMENT_ID
 
     if args.cmd == 'players':
         player_profiles = fetch_player_profiles()
 
-    elif args.cmd == 'create-leaderboard-table':
-        create_leaderboard_table()
+    elif args.cmd == 'clear-leaderboard':
+        clear_leaderboard(tournament_id)
 
     elif args.cmd == 'manage-leaderboard':
-        manage_leaderboard(TOURNAMENT_ID, args.round_num)
+        if args.tournament_id is None:
+            manage_active_leaderboards()
+        else:
+            manage_leaderboard(args.tournament_id, args.round_num)
+
+    elif args.cmd == 'leaderboard-at':
+        print_leaderboard_at(tournament_id, args.at if args.at is not None else datetime.now())
+
+    elif args.cmd == 'season-standings':
+        rebuild_season_standings()
+        print_season_standings(get_current_season())
 
     elif args.cmd == 'update-leaderboard':
-        update_leaderboard(TOURNAMENT_ID)
+        update_leaderboard(tournament_id)
 
     elif args.cmd == 'tournaments':
-        create_tournaments_table()
         populate_tournaments_table()
 
     elif args.cmd == 'salaries':
-        create_salaries_table()
-        populate_salaries_table(TOURNAMENT_ID)
+        report = populate_salaries_table(tournament_id)
+        if report is not None:
+            pprint(report['UnmatchedProfiles'])
 
     elif args.cmd == 'autopick':
-        autopick(TOURNAMENT_ID, args.num_rosters)
+        autopick(tournament_id, args.num_rosters, min(args.max_overlap, NUM_PICKS - args.min_unique))
 
     elif args.cmd == 'values':
-        values(TOURNAMENT_ID)
+        values(tournament_id)
 
     elif args.cmd == 'points':
-        points(TOURNAMENT_ID)
+        points(tournament_id)
 
     elif args.cmd == 'picks':
-        update_picks()
+        update_picks(tournament_id)
 
     elif args.cmd == 'clear-picks':
-        create_picks_table()
-        update_leaderboard(TOURNAMENT_ID)
+        clear_picks(tournament_id)
+        update_leaderboard(tournament_id)
 
     elif args.cmd == 'flask':
         app.run(host='0.0.0.0', port=80, debug=True)